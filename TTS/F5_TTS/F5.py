@@ -1,35 +1,53 @@
+import io
 import os
 import re
-import mimetypes
 import random
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import numpy as np
 import soundfile as sf
-import torchaudio
+import torch
 from cached_path import cached_path
-from pydub import AudioSegment
 
 from TTS.F5_TTS.model import DiT, UNetT
 from TTS.F5_TTS.model.utils import save_spectrogram
 from TTS.F5_TTS.model.utils_infer import (
-    load_vocoder,
+    device,
     load_model,
     preprocess_ref_audio_text,
     infer_process,
-    remove_silence_for_generated_wav,
+    infer_multi_process,
+    remove_silence_for_generated_wave,
 )
 
-# Initialize vocoder
-vocos = load_vocoder()
-
 # Define model configurations
 F5TTS_model_cfg = dict(
     dim=1024, depth=22, heads=16, ff_mult=2, text_dim=512, conv_layers=4
 )
 E2TTS_model_cfg = dict(dim=1024, depth=24, heads=16, ff_mult=4)
 
-# Define global variables for caching models
-loaded_models = {"F5-TTS": None, "E2-TTS": None}
+# File extensions of reference audio that can be used as a voice
+AUDIO_EXTS = frozenset({".wav", ".mp3", ".flac", ".ogg", ".m4a", ".opus"})
+
+# Speaker turns in podcast scripts, e.g. "speaker1: Hello"
+speaker_pattern = re.compile(r"\s*(speaker[12]):[\s]*")
+# Emotion markers in speech type texts, e.g. "(Happy)"
+emotion_pattern = re.compile(r"\((.*?)\)")
+
+# Model classes, configurations and checkpoints by model name
+model_checkpoints = {
+    "F5-TTS": (
+        DiT,
+        F5TTS_model_cfg,
+        "hf://SWivid/F5-TTS/F5TTS_Base/model_1200000.safetensors",
+    ),
+    "E2-TTS": (
+        UNetT,
+        E2TTS_model_cfg,
+        "hf://SWivid/E2-TTS/E2TTS_Base/model_1200000.safetensors",
+    ),
+}
 
 
 def get_available_voices(directory: str) -> list:
@@ -42,17 +60,27 @@ def get_available_voices(directory: str) -> list:
     Returns:
         list: A list of available voice filenames (including their extensions).
     """
-    available_voices = []
-
-    # Get list of all audio and .txt files in the directory
-    audio_files = {
-        f
-        for f in os.listdir(directory)
-        if mimetypes.guess_type(f)[0] and mimetypes.guess_type(f)[0].startswith("audio")
-    }
-    transcript_files = {f for f in os.listdir(directory) if f.endswith(".txt")}
+    # The directory mtime changes whenever a file is added, removed or renamed
+    return list(_scan_voices(directory, os.stat(directory).st_mtime_ns))
+
+
+@lru_cache(maxsize=8)
+def _scan_voices(directory: str, mtime_ns: int) -> tuple:
+    # Get all audio and .txt files in the directory in a single pass
+    audio_files = set()
+    transcript_files = set()
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            extension = os.path.splitext(entry.name)[1].lower()
+            if extension in AUDIO_EXTS:
+                audio_files.add(entry.name)
+            elif extension == ".txt":
+                transcript_files.add(entry.name)
 
     # Find common base filenames (without extensions) that have both audio and .txt files
+    available_voices = []
     for audio_file in audio_files:
         base_name = os.path.splitext(audio_file)[
             0
@@ -61,7 +89,7 @@ def get_available_voices(directory: str) -> list:
         if transcript_file in transcript_files:
             available_voices.append(audio_file)  # Append the full audio filename
 
-    return available_voices
+    return tuple(available_voices)
 
 
 def pick_random_voice(available_voices: list, previous_voice: str = None) -> str:
@@ -97,33 +125,80 @@ def load_transcript(voice_file: str, file_path: str) -> str:
     base_name = os.path.splitext(voice_file)[0]  # remove extension
     transcript_file = os.path.join(file_path, base_name + ".txt")
 
-    if not os.path.exists(transcript_file):
+    try:
+        mtime_ns = os.stat(transcript_file).st_mtime_ns
+    except FileNotFoundError:
         transcript = transcribe_audio(os.path.join(file_path, voice_file))
         return transcript
 
-    else:
-        with open(transcript_file, "r", encoding="utf-") as file:
-            transcript = file.read()
-        return transcript
+    return _read_transcript(transcript_file, mtime_ns)
 
 
+@lru_cache(maxsize=64)
+def _read_transcript(transcript_file: str, mtime_ns: int) -> str:
+    with open(transcript_file, "r", encoding="utf-8") as file:
+        transcript = file.read()
+    return transcript
+
+
+def prepare_reference(ref_audio_orig, ref_text):
+    """Preprocess reference audio and text, reusing the result while the audio file is unchanged."""
+    try:
+        mtime_ns = os.stat(ref_audio_orig).st_mtime_ns
+    except (OSError, TypeError):
+        return preprocess_ref_audio_text(ref_audio_orig, ref_text)
+
+    ref_audio, ref_text = _preprocess_reference(ref_audio_orig, mtime_ns, ref_text)
+    return io.BytesIO(ref_audio), ref_text
+
+
+@lru_cache(maxsize=32)
+def _preprocess_reference(ref_audio_orig: str, mtime_ns: int, ref_text: str) -> tuple:
+    ref_audio, ref_text = preprocess_ref_audio_text(ref_audio_orig, ref_text)
+    return ref_audio.getvalue(), ref_text
+
+
+@lru_cache(maxsize=2)
 def load_model_on_demand(model_name):
-    """Load the model only when it's needed."""
-    if model_name == "F5-TTS" and not loaded_models["F5-TTS"]:
-        loaded_models["F5-TTS"] = load_model(
-            DiT,
-            F5TTS_model_cfg,
-            str(cached_path("hf://SWivid/F5-TTS/F5TTS_Base/model_1200000.safetensors")),
-        )
-    elif model_name == "E2-TTS" and not loaded_models["E2-TTS"]:
-        loaded_models["E2-TTS"] = load_model(
-            UNetT,
-            E2TTS_model_cfg,
-            str(cached_path("hf://SWivid/E2-TTS/E2TTS_Base/model_1200000.safetensors")),
+    """Load the model only when it's needed, later calls return the cached model."""
+    if model_name not in model_checkpoints:
+        raise ValueError(f"Unknown model {model_name}")
+
+    model_cls, model_cfg, ckpt_url = model_checkpoints[model_name]
+    ema_model = load_model(model_cls, model_cfg, str(cached_path(ckpt_url)))
+
+    # load_model already keeps the weights in fp16 on CUDA; int8 halves the weight reads again
+    if device == "cuda" and os.getenv("F5_QUANTIZE", "").lower() == "int8":
+        try:
+            from torchao.quantization import int8_weight_only, quantize_
+        except ImportError:
+            print("Warning: F5_QUANTIZE=int8 needs torchao, skipping quantization")
+        else:
+            quantize_(ema_model.transformer, int8_weight_only())
+
+    if compile_enabled():
+        # Capture the transformer forward in CUDA graphs; bucketing the sampled
+        # length keeps the number of captured shapes small
+        ema_model.transformer = torch.compile(
+            ema_model.transformer, mode="reduce-overhead", fullgraph=False
         )
-    return loaded_models[model_name]
+        ema_model.duration_bucket = 128
+
+    return ema_model
 
 
+def compile_enabled() -> bool:
+    """Whether the F5_COMPILE option applies on this device."""
+    return device == "cuda" and os.getenv("F5_COMPILE", "False").lower() == "true"
+
+
+def warmup(models=("F5-TTS",)):
+    """Load the given models ahead of time so the first infer() call doesn't pay for it."""
+    for model_name in models:
+        load_model_on_demand(model_name)
+
+
+@torch.inference_mode()
 def infer(
     ref_audio_orig,
     ref_text,
@@ -133,7 +208,7 @@ def infer(
     cross_fade_duration=0.15,
     speed: float = 1.0,
 ):
-    ref_audio, ref_text = preprocess_ref_audio_text(ref_audio_orig, ref_text)
+    ref_audio, ref_text = prepare_reference(ref_audio_orig, ref_text)
 
     # Load the required model
     ema_model = load_model_on_demand(model)
@@ -149,11 +224,7 @@ def infer(
 
     # Remove silence
     if remove_silence:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-            sf.write(f.name, final_wave, final_sample_rate)
-            remove_silence_for_generated_wav(f.name)
-            final_wave, _ = torchaudio.load(f.name)
-        final_wave = final_wave.squeeze().cpu().numpy()
+        final_wave = remove_silence_for_generated_wave(final_wave, final_sample_rate)
 
     # Save the spectrogram
     with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp_spectrogram:
@@ -163,11 +234,93 @@ def infer(
     return (final_sample_rate, final_wave), spectrogram_path
 
 
-def generate_podcast(
-    script, ref_audio1, ref_text1, ref_audio2, ref_text2, model, remove_silence
+@torch.inference_mode()
+def infer_batch(
+    ref_audio_orig,
+    ref_text,
+    gen_texts,
+    model,
+    remove_silence,
+    cross_fade_duration=0.15,
+    speed: float = 1.0,
+    batch_size: int = 4,
 ):
     """
-    Generate a podcast from a script with two speakers.
+    Batched variant of infer() for several texts spoken by the same reference voice.
+
+    Returns:
+        list: One (sample_rate, wave) tuple per entry of gen_texts.
+    """
+    ref_audio, ref_text = prepare_reference(ref_audio_orig, ref_text)
+
+    # Load the required model
+    ema_model = load_model_on_demand(model)
+
+    results = infer_multi_process(
+        ref_audio,
+        ref_text,
+        gen_texts,
+        ema_model,
+        batch_size=batch_size,
+        cross_fade_duration=cross_fade_duration,
+        speed=speed,
+    )
+
+    audios = []
+    for final_wave, final_sample_rate, _ in results:
+        # Remove silence
+        if remove_silence:
+            final_wave = remove_silence_for_generated_wave(final_wave, final_sample_rate)
+        audios.append((final_sample_rate, final_wave))
+
+    return audios
+
+
+def split_podcast_script(script: str) -> list:
+    """
+    Split a podcast script into speaker turns.
+
+    Args:
+        script (str): The podcast script with speaker1 and speaker2 annotations
+
+    Returns:
+        list: (speaker, text) tuples in script order
+    """
+    # Clean and normalize the script
+    script = script.strip()
+
+    # Walk the speaker labels once; each turn is the text up to the next label
+    matches = list(speaker_pattern.finditer(script))
+    if matches and script[: matches[0].start()].strip():
+        print("Warning: Text before the first speaker label, skipping it")
+
+    # Collect (speaker, text) turns in script order
+    turns = []
+    for match, next_match in zip(matches, matches[1:] + [None]):
+        end = next_match.start() if next_match else len(script)
+        text = script[match.end() : end].strip()
+
+        # Skip if text is empty
+        if not text:
+            continue
+
+        turns.append((match.group(1), text))
+
+    return turns
+
+
+def iter_podcast(
+    script,
+    ref_audio1,
+    ref_text1,
+    ref_audio2,
+    ref_text2,
+    model,
+    remove_silence,
+    window: int = 8,
+):
+    """
+    Generate the turns of a podcast script, batching each speaker's turns within a window of turns.
 
     Args:
         script (str): The podcast script with speaker1 and speaker2 annotations
@@ -177,108 +330,179 @@ def generate_podcast(
         ref_text2 (str): Reference text for speaker2
         model (str): Model name to use for generation
         remove_silence (bool): Whether to remove silence from generated audio
+        window (int): Number of consecutive turns generated before they are yielded
 
-    Returns:
-        str: Path to the generated podcast audio file
+    Yields:
+        tuple: (sample_rate, 16-bit PCM array) of each generated turn, in script order
     """
-    # Clean and normalize the script
-    script = script.strip()
+    turns = split_podcast_script(script)
 
-    # Improved regex pattern to handle various newline formats and spacing
-    speaker_blocks = re.split(r"\s*(speaker[12]):[\s]*", script)
-
-    # Remove empty strings and process blocks
-    speaker_blocks = [block for block in speaker_blocks if block.strip()]
+    references = {
+        "speaker1": (ref_audio1, ref_text1),
+        "speaker2": (ref_audio2, ref_text2),
+    }
 
-    generated_audio_segments = []
+    # On CUDA each speaker runs on its own stream and thread, so one speaker's sampling
+    # overlaps the other's CPU vocoding. CUDA graphs of a compiled model can't be
+    # replayed from several threads, so compiled models run the speakers in turn.
+    parallel = device == "cuda" and not compile_enabled()
 
-    # Process each speaker block
-    for i in range(0, len(speaker_blocks), 2):
-        if i + 1 >= len(speaker_blocks):
-            break
+    # Load the model and preprocess both references here, before the speaker
+    # threads start; the loaders are unlocked caches, so two cold threads would
+    # each build the checkpoint (and the ASR pipeline) at the same time
+    load_model_on_demand(model)
+    for speaker, (ref_audio, ref_text) in references.items():
+        try:
+            prepare_reference(ref_audio, ref_text)
+        except Exception as e:
+            # Left to fail per block in generate_speaker, as before
+            print(f"Warning: Failed to prepare the reference for {speaker}: {e}")
 
-        speaker = speaker_blocks[i].lower().strip()
-        text = speaker_blocks[i + 1].strip()
+    streams = {speaker: torch.cuda.Stream() for speaker in references} if parallel else {}
+    executor = ThreadPoolExecutor(max_workers=len(references) if parallel else 1)
 
-        # Skip if text is empty
-        if not text:
-            continue
+    def generate_blocks(speaker, ref_audio, ref_text, texts):
+        try:
+            return infer_batch(ref_audio, ref_text, texts, model, remove_silence)
+        except Exception as e:
+            if len(texts) == 1:
+                print(f"Warning: Failed to generate audio for {speaker}: {e}")
+                return [None]
+            print(f"Warning: Batch for {speaker} failed, generating block by block: {e}")
+
+        # Retry one block at a time so a single bad block only loses itself
+        audios = []
+        for text in texts:
+            try:
+                audios.extend(infer_batch(ref_audio, ref_text, [text], model, remove_silence))
+            except Exception as e:
+                print(f"Warning: Failed to generate audio for {speaker}: {e}")
+                audios.append(None)
+        return audios
+
+    def generate_speaker(speaker, ref_audio, ref_text, texts):
+        """Returns one (sample_rate, wave) per text, or None where generation failed."""
+        print(f"Generating audio for {len(texts)} blocks of {speaker}...")
+        if speaker not in streams:
+            return generate_blocks(speaker, ref_audio, ref_text, texts)
+
+        with torch.cuda.stream(streams[speaker]):
+            audios = generate_blocks(speaker, ref_audio, ref_text, texts)
+        streams[speaker].synchronize()
+        return audios
 
-        # Select appropriate reference audio and text
-        if speaker == "speaker1":
-            ref_audio = ref_audio1
-            ref_text = ref_text1
-        elif speaker == "speaker2":
-            ref_audio = ref_audio2
-            ref_text = ref_text2
-        else:
-            print(f"Warning: Unknown speaker {speaker}, skipping block")
-            continue
+    try:
+        for start in range(0, len(turns), window):
+            window_turns = turns[start : start + window]
+
+            # Generate the window's turns of a speaker as one batch
+            futures = {}
+            for speaker, (ref_audio, ref_text) in references.items():
+                indices = [
+                    i for i, (turn_speaker, _) in enumerate(window_turns) if turn_speaker == speaker
+                ]
+                if not indices:
+                    continue
+
+                futures[speaker] = (
+                    indices,
+                    executor.submit(
+                        generate_speaker,
+                        speaker,
+                        ref_audio,
+                        ref_text,
+                        [window_turns[i][1] for i in indices],
+                    ),
+                )
+
+            generated_turns = {}
+            for speaker, (indices, future) in futures.items():
+                try:
+                    generated_turns.update(
+                        (i, audio) for i, audio in zip(indices, future.result()) if audio is not None
+                    )
+                except Exception as e:
+                    print(f"Warning: Failed to generate audio for {speaker}: {e}")
+                    continue
+
+            # Re-interleave the generated turns in script order, converting each to 16-bit PCM once
+            for i in range(len(window_turns)):
+                if i not in generated_turns:
+                    continue
+
+                sr, audio_data = generated_turns[i]
+                yield sr, np.clip(audio_data * 32767, -32768, 32767).astype(np.int16, copy=False)
+    finally:
+        executor.shutdown(wait=True)
 
-        try:
-            # Generate audio for this block
-            print(f"Generating audio for {speaker}: {text[:50]}...")
-            audio, _ = infer(ref_audio, ref_text, text, model, remove_silence)
 
-            # Unpack audio data
-            sr, audio_data = audio
+def generate_podcast(
+    script, ref_audio1, ref_text1, ref_audio2, ref_text2, model, remove_silence
+):
+    """
+    Generate a podcast from a script with two speakers.
 
-            # Save temporary WAV file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                sf.write(temp_file.name, audio_data, sr)
-                audio_segment = AudioSegment.from_wav(temp_file.name)
-                os.unlink(temp_file.name)  # Clean up temp file
+    Args:
+        script (str): The podcast script with speaker1 and speaker2 annotations
+        ref_audio1 (str): Path to reference audio file for speaker1
+        ref_text1 (str): Reference text for speaker1
+        ref_audio2 (str): Path to reference audio file for speaker2
+        ref_text2 (str): Reference text for speaker2
+        model (str): Model name to use for generation
+        remove_silence (bool): Whether to remove silence from generated audio
 
-            # Add the audio segment
-            generated_audio_segments.append(audio_segment)
+    Returns:
+        str: Path to the generated podcast audio file
+    """
+    podcast_path = None
+    podcast_file = None
+    try:
+        # Stream every turn to the file as it is generated
+        for sr, audio_data in iter_podcast(
+            script, ref_audio1, ref_text1, ref_audio2, ref_text2, model, remove_silence
+        ):
+            if podcast_file is None:
+                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
+                    podcast_path = temp_file.name
+                podcast_file = sf.SoundFile(
+                    podcast_path, "w", samplerate=sr, channels=1, subtype="PCM_16"
+                )
+                pause = np.zeros(int(0.5 * sr), dtype=np.int16)
+
+            podcast_file.write(audio_data)
 
             # Add a short pause between speakers (500ms)
-            generated_audio_segments.append(AudioSegment.silent(duration=500))
-
-        except Exception as e:
-            print(f"Warning: Failed to generate audio for block: {e}")
-            continue
+            podcast_file.write(pause)
+    finally:
+        if podcast_file is not None:
+            podcast_file.close()
 
     # Check if we have any generated segments
-    if not generated_audio_segments:
+    if podcast_file is None:
         raise ValueError(
             "No audio segments were generated. Please check the input script and speakers."
         )
 
-    # Combine all segments
-    final_podcast = generated_audio_segments[0]
-    for segment in generated_audio_segments[1:]:
-        final_podcast += segment
-
-    # Export final podcast
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-        podcast_path = temp_file.name
-        final_podcast.export(podcast_path, format="wav")
-
     return podcast_path
 
 
 def parse_speechtypes_text(gen_text):
-    # Pattern to find (Emotion)
-    pattern = r"\((.*?)\)"
-
-    # Split the text by the pattern
-    tokens = re.split(pattern, gen_text)
-
     segments = []
 
     current_emotion = "Regular"
-
-    for i in range(len(tokens)):
-        if i % 2 == 0:
-            # This is text
-            text = tokens[i].strip()
-            if text:
-                segments.append({"emotion": current_emotion, "text": text})
-        else:
-            # This is emotion
-            emotion = tokens[i].strip()
-            current_emotion = emotion
+    start = 0
+
+    # Each (Emotion) tag closes the preceding text and sets the next emotion
+    for match in emotion_pattern.finditer(gen_text):
+        text = gen_text[start : match.start()].strip()
+        if text:
+            segments.append({"emotion": current_emotion, "text": text})
+        current_emotion = match.group(1).strip()
+        start = match.end()
+
+    text = gen_text[start:].strip()
+    if text:
+        segments.append({"emotion": current_emotion, "text": text})
 
     return segments
 
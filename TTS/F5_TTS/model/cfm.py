@@ -46,6 +46,7 @@ class CFM(nn.Module):
         mel_spec_kwargs: dict = dict(),
         frac_lengths_mask: tuple[float, float] = (0.7, 1.0),
         vocab_char_map: dict[str:int] | None = None,
+        duration_bucket: int | None = None,
     ):
         super().__init__()
 
@@ -74,6 +75,9 @@ class CFM(nn.Module):
         # vocab map for tokenization
         self.vocab_char_map = vocab_char_map
 
+        # pad sampled sequences to a multiple of this, so a compiled transformer only sees a few shapes
+        self.duration_bucket = duration_bucket
+
     @property
     def device(self):
         return next(self.parameters()).device
@@ -138,6 +142,8 @@ class CFM(nn.Module):
         duration = torch.maximum(lens + 1, duration)  # just add one token so something is generated
         duration = duration.clamp(max=max_duration)
         max_duration = duration.amax()
+        if exists(self.duration_bucket):
+            max_duration = (max_duration + self.duration_bucket - 1) // self.duration_bucket * self.duration_bucket
 
         # duplicate test corner for inner time step oberservation
         if duplicate_test:
@@ -150,8 +156,8 @@ class CFM(nn.Module):
             cond_mask, cond, torch.zeros_like(cond)
         )  # allow direct control (cut cond audio) with lens passed in
 
-        if batch > 1:
-            mask = lens_to_mask(duration)
+        if batch > 1 or exists(self.duration_bucket):
+            mask = lens_to_mask(duration, length=max_duration)
         else:  # save memory and speed up, as single inference need no mask currently
             mask = None
 
@@ -186,6 +192,7 @@ class CFM(nn.Module):
                 torch.manual_seed(seed)
             y0.append(torch.randn(dur, self.num_channels, device=self.device, dtype=step_cond.dtype))
         y0 = pad_sequence(y0, padding_value=0, batch_first=True)
+        y0 = F.pad(y0, (0, 0, 0, max_duration - y0.shape[1]), value=0.0)
 
         t_start = 0
 
@@ -204,6 +211,7 @@ class CFM(nn.Module):
         sampled = trajectory[-1]
         out = sampled
         out = torch.where(cond_mask, cond, out)
+        out = out[:, : duration.amax()]  # drop the bucket padding
 
         if exists(vocoder):
             out = out.permute(0, 2, 1)
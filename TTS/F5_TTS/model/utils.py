@@ -6,6 +6,7 @@ import random
 import string
 from tqdm import tqdm
 from collections import defaultdict
+from itertools import repeat
 
 import matplotlib
 
@@ -102,8 +103,10 @@ def list_str_to_idx(
     vocab_char_map: dict[str, int],  # {char: idx}
     padding_value=-1,
 ) -> int["b nt"]:  # noqa: F722
+    # map() drives the dict lookups from C rather than a per-token comprehension
     list_idx_tensors = [
-        torch.tensor([vocab_char_map.get(c, 0) for c in t]) for t in text
+        torch.tensor(list(map(vocab_char_map.get, t, repeat(0))), dtype=torch.long)
+        for t in text
     ]  # pinyin or char style
     text = pad_sequence(list_idx_tensors, padding_value=padding_value, batch_first=True)
     return text
@@ -152,16 +155,26 @@ def get_tokenizer(dataset_name, tokenizer: str = "pinyin"):
 # convert char to pinyin
 
 
+# Quote and punctuation fixes for convert_char_to_pinyin, merged into one
+# table so each text is translated in a single pass
+PINYIN_TEXT_TRANS = str.maketrans(
+    {
+        # in case librispeech (orig no-pc) test-clean
+        "“": '"',
+        "”": '"',
+        "‘": "'",
+        "’": "'",
+        # add custom trans here, to address oov
+        ";": ",",
+    }
+)
+
+
 def convert_char_to_pinyin(text_list, polyphone=True):
     final_text_list = []
-    god_knows_why_en_testset_contains_zh_quote = str.maketrans(
-        {"“": '"', "”": '"', "‘": "'", "’": "'"}
-    )  # in case librispeech (orig no-pc) test-clean
-    custom_trans = str.maketrans({";": ","})  # add custom trans here, to address oov
     for text in text_list:
         char_list = []
-        text = text.translate(god_knows_why_en_testset_contains_zh_quote)
-        text = text.translate(custom_trans)
+        text = text.translate(PINYIN_TEXT_TRANS)
         for seg in jieba.cut(text):
             seg_byte_len = len(bytes(seg, "UTF-8"))
             if seg_byte_len == len(seg):  # if pure alphabets and symbols
@@ -638,7 +651,7 @@ def load_checkpoint(model, ckpt_path, device, use_ema=True):
 
         checkpoint = load_file(ckpt_path)
     else:
-        checkpoint = torch.load(ckpt_path, weights_only=True)
+        checkpoint = torch.load(ckpt_path, map_location="cpu", mmap=True, weights_only=True)
 
     if use_ema:
         if ckpt_type == "safetensors":
@@ -1,8 +1,9 @@
 # A unified script for inference process
 # Make adjustments inside functions, and consider both gradio and cli scripts if need to change func output format
 
+import io
+import logging
 import re
-import tempfile
 
 import numpy as np
 import torch
@@ -19,6 +20,12 @@ from TTS.F5_TTS.model.utils import (
     convert_char_to_pinyin,
 )
 
+logger = logging.getLogger(__name__)
+
+# Sentence/clause boundaries: ASCII punctuation followed by whitespace, or
+# full-width punctuation on its own
+SENTENCE_SPLIT_REGEX = re.compile(r"(?<=[;:,.!?])\s+|(?<=[；：，。！？])")
+
 
 device = "cuda" if torch.cuda.is_available() else "mps" if torch.backends.mps.is_available() else "cpu"
 
@@ -59,7 +66,7 @@ def chunk_text(text, max_chars=135):
     chunks = []
     current_chunk = ""
     # Split the text into sentences based on punctuation followed by whitespace
-    sentences = re.split(r"(?<=[;:,.!?])\s+|(?<=[；：，。！？])", text)
+    sentences = SENTENCE_SPLIT_REGEX.split(text)
 
     for sentence in sentences:
         if len(current_chunk.encode("utf-8")) + len(sentence.encode("utf-8")) <= max_chars:
@@ -142,21 +149,20 @@ def load_model(model_cls, model_cfg, ckpt_path, vocab_file="", ode_method=ode_me
 
 def preprocess_ref_audio_text(ref_audio_orig, ref_text, show_info=print, device=device):
     show_info("Converting audio...")
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-        aseg = AudioSegment.from_file(ref_audio_orig)
-
-        non_silent_segs = silence.split_on_silence(aseg, min_silence_len=1000, silence_thresh=-50, keep_silence=1000)
-        non_silent_wave = AudioSegment.silent(duration=0)
-        for non_silent_seg in non_silent_segs:
-            non_silent_wave += non_silent_seg
-        aseg = non_silent_wave
-
-        audio_duration = len(aseg)
-        if audio_duration > 15000:
-            show_info("Audio is over 15s, clipping to only first 15s.")
-            aseg = aseg[:15000]
-        aseg.export(f.name, format="wav")
-        ref_audio = f.name
+    aseg = AudioSegment.from_file(ref_audio_orig)
+
+    non_silent_segs = silence.split_on_silence(aseg, min_silence_len=1000, silence_thresh=-50, keep_silence=1000)
+    # join the raw pcm once, the segments share the source's sample format
+    aseg = aseg._spawn(b"".join(non_silent_seg.raw_data for non_silent_seg in non_silent_segs))
+
+    audio_duration = len(aseg)
+    if audio_duration > 15000:
+        show_info("Audio is over 15s, clipping to only first 15s.")
+        aseg = aseg[:15000]
+
+    # keep the converted wav in memory instead of a temporary file
+    ref_audio = io.BytesIO()
+    aseg.export(ref_audio, format="wav")
 
     if not ref_text.strip():
         global asr_pipe
@@ -164,7 +170,7 @@ def preprocess_ref_audio_text(ref_audio_orig, ref_text, show_info=print, device=
             initialize_asr_pipeline(device=device)
         show_info("No reference text provided, transcribing reference audio...")
         ref_text = asr_pipe(
-            ref_audio,
+            ref_audio.getvalue(),
             chunk_length_s=30,
             batch_size=128,
             generate_kwargs={"task": "transcribe"},
@@ -184,6 +190,16 @@ def preprocess_ref_audio_text(ref_audio_orig, ref_text, show_info=print, device=
     return ref_audio, ref_text
 
 
+# load reference audio, either a path or the in-memory wav from preprocess_ref_audio_text
+
+
+def load_ref_audio(ref_audio):
+    if isinstance(ref_audio, io.BytesIO):
+        ref_audio.seek(0)
+        return torchaudio.load(ref_audio, format="wav")
+    return torchaudio.load(ref_audio)
+
+
 # infer process: chunk text -> infer batches [i.e. infer_batch_process()]
 
 
@@ -204,11 +220,11 @@ def infer_process(
     device=device,
 ):
     # Split the input text into batches
-    audio, sr = torchaudio.load(ref_audio)
+    audio, sr = load_ref_audio(ref_audio)
     max_chars = int(len(ref_text.encode("utf-8")) / (audio.shape[-1] / sr) * (25 - audio.shape[-1] / sr))
     gen_text_batches = chunk_text(gen_text, max_chars=max_chars)
     for i, gen_text in enumerate(gen_text_batches):
-        print(f"gen_text {i}", gen_text)
+        logger.debug(f"gen_text {i}: {gen_text}")
 
     show_info(f"Generating audio in {len(gen_text_batches)} batches...")
     return infer_batch_process(
@@ -228,9 +244,10 @@ def infer_process(
     )
 
 
-# infer batches
+# infer batches; inference mode is entered once for the whole run rather than per chunk
 
 
+@torch.inference_mode()
 def infer_batch_process(
     ref_audio,
     ref_text,
@@ -278,70 +295,189 @@ def infer_batch_process(
             duration = ref_audio_len + int(ref_audio_len / ref_text_len * gen_text_len / speed)
 
         # inference
-        with torch.inference_mode():
-            generated, _ = model_obj.sample(
-                cond=audio,
-                text=final_text_list,
-                duration=duration,
-                steps=nfe_step,
-                cfg_strength=cfg_strength,
-                sway_sampling_coef=sway_sampling_coef,
-            )
-
-        generated = generated.to(torch.float32)
-        generated = generated[:, ref_audio_len:, :]
+        generated, _ = model_obj.sample(
+            cond=audio,
+            text=final_text_list,
+            duration=duration,
+            steps=nfe_step,
+            cfg_strength=cfg_strength,
+            sway_sampling_coef=sway_sampling_coef,
+        )
+
+        # the vocoder runs on cpu, copy the generated mel off the device once
+        generated = generated[:, ref_audio_len:, :].to("cpu", torch.float32)
         generated_mel_spec = generated.permute(0, 2, 1)
-        generated_wave = vocos.decode(generated_mel_spec.cpu())
+        generated_wave = vocos.decode(generated_mel_spec)
         if rms < target_rms:
             generated_wave = generated_wave * rms / target_rms
 
         # wav -> numpy
-        generated_wave = generated_wave.squeeze().cpu().numpy()
+        generated_wave = generated_wave.squeeze().numpy()
 
         generated_waves.append(generated_wave)
-        spectrograms.append(generated_mel_spec[0].cpu().numpy())
+        spectrograms.append(generated_mel_spec[0].numpy())
 
     # Combine all generated waves with cross-fading
+    final_wave = cross_fade_waves(generated_waves, cross_fade_duration)
+
+    # Create a combined spectrogram
+    combined_spectrogram = np.concatenate(spectrograms, axis=1)
+
+    return final_wave, target_sample_rate, combined_spectrogram
+
+
+# combine waves with cross-fading
+
+
+def cross_fade_waves(generated_waves, cross_fade_duration=0.15):
     if cross_fade_duration <= 0:
         # Simply concatenate
-        final_wave = np.concatenate(generated_waves)
-    else:
-        final_wave = generated_waves[0]
-        for i in range(1, len(generated_waves)):
-            prev_wave = final_wave
-            next_wave = generated_waves[i]
+        return np.concatenate(generated_waves)
 
-            # Calculate cross-fade samples, ensuring it does not exceed wave lengths
-            cross_fade_samples = int(cross_fade_duration * target_sample_rate)
-            cross_fade_samples = min(cross_fade_samples, len(prev_wave), len(next_wave))
+    final_wave = generated_waves[0]
+    for i in range(1, len(generated_waves)):
+        prev_wave = final_wave
+        next_wave = generated_waves[i]
 
-            if cross_fade_samples <= 0:
-                # No overlap possible, concatenate
-                final_wave = np.concatenate([prev_wave, next_wave])
-                continue
+        # Calculate cross-fade samples, ensuring it does not exceed wave lengths
+        cross_fade_samples = int(cross_fade_duration * target_sample_rate)
+        cross_fade_samples = min(cross_fade_samples, len(prev_wave), len(next_wave))
 
-            # Overlapping parts
-            prev_overlap = prev_wave[-cross_fade_samples:]
-            next_overlap = next_wave[:cross_fade_samples]
+        if cross_fade_samples <= 0:
+            # No overlap possible, concatenate
+            final_wave = np.concatenate([prev_wave, next_wave])
+            continue
 
-            # Fade out and fade in
-            fade_out = np.linspace(1, 0, cross_fade_samples)
-            fade_in = np.linspace(0, 1, cross_fade_samples)
+        # Overlapping parts
+        prev_overlap = prev_wave[-cross_fade_samples:]
+        next_overlap = next_wave[:cross_fade_samples]
 
-            # Cross-faded overlap
-            cross_faded_overlap = prev_overlap * fade_out + next_overlap * fade_in
+        # Fade out and fade in
+        fade_out = np.linspace(1, 0, cross_fade_samples)
+        fade_in = np.linspace(0, 1, cross_fade_samples)
 
-            # Combine
-            new_wave = np.concatenate(
-                [prev_wave[:-cross_fade_samples], cross_faded_overlap, next_wave[cross_fade_samples:]]
-            )
+        # Cross-faded overlap
+        cross_faded_overlap = prev_overlap * fade_out + next_overlap * fade_in
 
-            final_wave = new_wave
+        # Combine
+        final_wave = np.concatenate(
+            [prev_wave[:-cross_fade_samples], cross_faded_overlap, next_wave[cross_fade_samples:]]
+        )
 
-    # Create a combined spectrogram
-    combined_spectrogram = np.concatenate(spectrograms, axis=1)
+    return final_wave
 
-    return final_wave, target_sample_rate, combined_spectrogram
+
+# infer several texts for one reference: chunk every text -> run chunks as padded batches
+
+
+@torch.inference_mode()
+def infer_multi_process(
+    ref_audio,
+    ref_text,
+    gen_texts,
+    model_obj,
+    batch_size=4,
+    show_info=print,
+    progress=tqdm,
+    target_rms=target_rms,
+    cross_fade_duration=cross_fade_duration,
+    nfe_step=nfe_step,
+    cfg_strength=cfg_strength,
+    sway_sampling_coef=sway_sampling_coef,
+    speed=speed,
+    device=device,
+):
+    """
+    Synthesizes several texts with the same reference voice, running up to
+    `batch_size` text chunks through one CFM sampling call.
+
+    Returns:
+        List[Tuple[np.ndarray, int, np.ndarray]]: (wave, sample_rate, spectrogram) per entry of gen_texts.
+    """
+    audio, sr = load_ref_audio(ref_audio)
+    max_chars = int(len(ref_text.encode("utf-8")) / (audio.shape[-1] / sr) * (25 - audio.shape[-1] / sr))
+
+    # Flatten the chunks of every text, remembering which text each chunk belongs to
+    chunks = []
+    owners = []
+    for owner, gen_text in enumerate(gen_texts):
+        for chunk in chunk_text(gen_text, max_chars=max_chars):
+            chunks.append(chunk)
+            owners.append(owner)
+
+    if audio.shape[0] > 1:
+        audio = torch.mean(audio, dim=0, keepdim=True)
+
+    rms = torch.sqrt(torch.mean(torch.square(audio)))
+    if rms < target_rms:
+        audio = audio * target_rms / rms
+    if sr != target_sample_rate:
+        resampler = torchaudio.transforms.Resample(sr, target_sample_rate)
+        audio = resampler(audio)
+    audio = audio.to(device)
+
+    if len(ref_text[-1].encode("utf-8")) == 1:
+        ref_text = ref_text + " "
+
+    ref_audio_len = audio.shape[-1] // hop_length
+    ref_text_len = len(ref_text.encode("utf-8"))
+
+    # compute the reference mel once and share it across the batch; the mel
+    # module's buffers follow the model dtype (fp16 on CUDA), so match it
+    audio = audio.to(next(model_obj.parameters()).dtype)
+    cond = model_obj.mel_spec(audio).permute(0, 2, 1)
+
+    show_info(f"Generating audio for {len(gen_texts)} texts in {len(chunks)} chunks...")
+    waves = [[] for _ in gen_texts]
+    spectrograms = [[] for _ in gen_texts]
+    for start in progress.tqdm(range(0, len(chunks), batch_size)):
+        batch_chunks = chunks[start : start + batch_size]
+        batch_owners = owners[start : start + batch_size]
+
+        # Prepare the texts and per-item durations; the sampler pads the
+        # token sequences and masks both the transformer and the padding frames
+        text_list = convert_char_to_pinyin([ref_text + chunk for chunk in batch_chunks])
+        durations = [
+            ref_audio_len + int(ref_audio_len / ref_text_len * len(chunk.encode("utf-8")) / speed)
+            for chunk in batch_chunks
+        ]
+        # Apply the sampler's own floor and cap up front (at least one frame past
+        # the longer of reference and text, at most max_duration), so the
+        # per-item slices below match what it actually generates
+        durations = [
+            min(max(duration, max(cond.shape[1], len(tokens)) + 1), 4096)
+            for duration, tokens in zip(durations, text_list)
+        ]
+
+        # inference
+        generated, _ = model_obj.sample(
+            cond=cond.expand(len(batch_chunks), -1, -1),
+            text=text_list,
+            duration=torch.tensor(durations, device=audio.device, dtype=torch.long),
+            steps=nfe_step,
+            cfg_strength=cfg_strength,
+            sway_sampling_coef=sway_sampling_coef,
+        )
+
+        # the vocoder runs on cpu, copy the generated batch off the device once
+        generated = generated[:, ref_audio_len:, :].to("cpu", torch.float32)
+        for i, owner in enumerate(batch_owners):
+            generated_mel_spec = generated[i : i + 1, : durations[i] - ref_audio_len, :].permute(0, 2, 1)
+            generated_wave = vocos.decode(generated_mel_spec)
+            if rms < target_rms:
+                generated_wave = generated_wave * rms / target_rms
+
+            waves[owner].append(generated_wave.squeeze().numpy())
+            spectrograms[owner].append(generated_mel_spec[0].numpy())
+
+    return [
+        (
+            cross_fade_waves(owner_waves, cross_fade_duration),
+            target_sample_rate,
+            np.concatenate(owner_spectrograms, axis=1),
+        )
+        for owner_waves, owner_spectrograms in zip(waves, spectrograms)
+    ]
 
 
 # remove silence from generated wav
@@ -350,8 +486,14 @@ def infer_batch_process(
 def remove_silence_for_generated_wav(filename):
     aseg = AudioSegment.from_file(filename)
     non_silent_segs = silence.split_on_silence(aseg, min_silence_len=1000, silence_thresh=-50, keep_silence=500)
-    non_silent_wave = AudioSegment.silent(duration=0)
-    for non_silent_seg in non_silent_segs:
-        non_silent_wave += non_silent_seg
-    aseg = non_silent_wave
+    aseg = aseg._spawn(b"".join(non_silent_seg.raw_data for non_silent_seg in non_silent_segs))
     aseg.export(filename, format="wav")
+
+
+def remove_silence_for_generated_wave(wave, sample_rate=target_sample_rate):
+    # same as remove_silence_for_generated_wav, but on an in-memory float wave
+    pcm = (np.clip(wave, -1, 1) * 32767).astype(np.int16)
+    aseg = AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=sample_rate, channels=1)
+    non_silent_segs = silence.split_on_silence(aseg, min_silence_len=1000, silence_thresh=-50, keep_silence=500)
+    non_silent_pcm = b"".join(non_silent_seg.raw_data for non_silent_seg in non_silent_segs)
+    return np.frombuffer(non_silent_pcm, dtype=np.int16).astype(np.float32) / 32768
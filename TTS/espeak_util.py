@@ -1,3 +1,6 @@
+import functools
+import hashlib
+import json
 import platform
 import subprocess
 import shutil
@@ -6,11 +9,23 @@ import os
 from typing import Optional, Tuple
 from phonemizer.backend.espeak.wrapper import EspeakWrapper
 
+# Paths found by an earlier run, so warm starts skip the filesystem search
+CACHE_FILE = Path.home() / ".cache" / "read2me" / "espeak.json"
+
+
+def _search_path_key() -> str:
+    """Short hash of the search path the cached espeak paths were found with."""
+    search_path = os.pathsep.join(
+        [os.environ.get("PATH", ""), os.environ.get("LD_LIBRARY_PATH", "")]
+    )
+    return hashlib.blake2b(search_path.encode("utf-8"), digest_size=8).hexdigest()
+
 
 class EspeakConfig:
     """Utility class for configuring espeak-ng library and binary."""
 
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def find_espeak_binary() -> tuple[bool, Optional[str]]:
         """
         Find espeak-ng binary using multiple methods.
@@ -61,6 +76,7 @@ class EspeakConfig:
         return False, None
 
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def find_library_path() -> Optional[str]:
         """
         Find the espeak-ng library using multiple search methods.
@@ -146,6 +162,49 @@ class EspeakConfig:
 
         return None
 
+    @staticmethod
+    def load_cached_paths() -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Load the binary and library paths saved by an earlier run.
+
+        Returns:
+            Optional[Tuple[str, Optional[str]]]: (binary path, library path) if they still exist, None otherwise
+        """
+        try:
+            cached = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        if cached.get("platform") != platform.system():
+            return None
+        if cached.get("search_path") != _search_path_key():
+            return None
+        binary_path, library_path = cached.get("binary"), cached.get("library")
+        if not binary_path or not os.path.exists(binary_path):
+            return None
+        if library_path and not os.path.exists(library_path):
+            return None
+        return binary_path, library_path
+
+    @staticmethod
+    def save_cached_paths(binary_path: str, library_path: Optional[str]) -> None:
+        """Save the found binary and library paths for the next run."""
+        try:
+            CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            CACHE_FILE.write_text(
+                json.dumps(
+                    {
+                        "binary": binary_path,
+                        "library": library_path,
+                        "platform": platform.system(),
+                        "search_path": _search_path_key(),
+                    }
+                ),
+                encoding="utf-8",
+            )
+        except OSError:
+            pass  # The cache is only an optimization
+
     @classmethod
     def configure_espeak(cls) -> Tuple[bool, str]:
         """
@@ -154,20 +213,25 @@ class EspeakConfig:
         Returns:
             Tuple[bool, str]: (Success status, Status message)
         """
-        # First check if espeak binary is available
-        espeak_available, espeak_path = cls.find_espeak_binary()
-        if not espeak_available:
-            raise FileNotFoundError(
-                "Could not find espeak-ng binary. Please install espeak-ng:\n"
-                "Ubuntu/Debian: sudo apt-get install espeak-ng espeak-ng-data\n"
-                "Fedora: sudo dnf install espeak-ng\n"
-                "Arch: sudo pacman -S espeak-ng\n"
-                "MacOS: brew install espeak-ng\n"
-                "Windows: Download from https://github.com/espeak-ng/espeak-ng/releases"
-            )
+        cached_paths = cls.load_cached_paths()
+        if cached_paths:
+            espeak_path, library_path = cached_paths
+        else:
+            # First check if espeak binary is available
+            espeak_available, espeak_path = cls.find_espeak_binary()
+            if not espeak_available:
+                raise FileNotFoundError(
+                    "Could not find espeak-ng binary. Please install espeak-ng:\n"
+                    "Ubuntu/Debian: sudo apt-get install espeak-ng espeak-ng-data\n"
+                    "Fedora: sudo dnf install espeak-ng\n"
+                    "Arch: sudo pacman -S espeak-ng\n"
+                    "MacOS: brew install espeak-ng\n"
+                    "Windows: Download from https://github.com/espeak-ng/espeak-ng/releases"
+                )
 
-        # Find the library
-        library_path = cls.find_library_path()
+            # Find the library
+            library_path = cls.find_library_path()
+            cls.save_cached_paths(espeak_path, library_path)
         if not library_path:
             # On Linux, we might not need to explicitly set the library path
             if platform.system() == "Linux":
@@ -30,9 +30,8 @@ SYMBOLS_MAPPING = {
     ":": ",",
 }
 
-REPLACE_SYMBOL_REGEX = re.compile(
-    "|".join(re.escape(p) for p in SYMBOLS_MAPPING.keys())
-)
+# Every key is a single character, so one translate pass replaces them all
+SYMBOLS_TRANSLATION = str.maketrans(SYMBOLS_MAPPING)
 
 
 EMOJI_REGEX = re.compile(
@@ -51,7 +50,7 @@ def clean_text(text):
     text = text.strip()
 
     # Replace all chinese symbols with their english counterparts
-    text = REPLACE_SYMBOL_REGEX.sub(lambda x: SYMBOLS_MAPPING[x.group()], text)
+    text = text.translate(SYMBOLS_TRANSLATION)
 
     # Remove emojis
     text = EMOJI_REGEX.sub(r"", text)
@@ -14,16 +14,15 @@ def break_text(texts, length, splits: set):
             yield text
             continue
 
-        curr = ""
-        for char in text:
-            curr += char
-
+        # Slice pieces out of the text instead of growing a string per char
+        start = 0
+        for i, char in enumerate(text):
             if char in splits:
-                yield curr
-                curr = ""
+                yield text[start : i + 1]
+                start = i + 1
 
-        if curr:
-            yield curr
+        if start < len(text):
+            yield text[start:]
 
 
 def break_text_by_length(texts, length):
@@ -32,16 +31,20 @@ def break_text_by_length(texts, length):
             yield text
             continue
 
-        curr = ""
-        for char in text:
-            curr += char
+        # Keep a running byte count rather than re-encoding the whole piece
+        # after every character, which made long unbroken runs quadratic
+        start = 0
+        curr_len = 0
+        for i, char in enumerate(text):
+            curr_len += utf_8_len(char)
 
-            if utf_8_len(curr) >= length:
-                yield curr
-                curr = ""
+            if curr_len >= length:
+                yield text[start : i + 1]
+                start = i + 1
+                curr_len = 0
 
-        if curr:
-            yield curr
+        if start < len(text):
+            yield text[start:]
 
 
 def add_cleaned(curr, segments):
@@ -2,7 +2,7 @@ import torch
 import numpy as np
 import queue
 from typing import Optional, Generator, Tuple
-from tools.api import decode_vq_tokens
+from tools.api import decode_vq_tokens_batch
 from tools.llama.generate import (
     GenerateRequest,
     GenerateResponse,
@@ -54,7 +54,7 @@ def inference(
         )
     )
 
-    segments = []
+    codes_list = []
 
     while True:
         result: WrappedGenerateResponse = response_queue.get()
@@ -66,17 +66,17 @@ def inference(
         if result.action == "next":
             break
 
-        fake_audios = decode_vq_tokens(
-            decoder_model=decoder_model,
-            codes=result.codes,
-        )
-
-        fake_audios = fake_audios.float().cpu().numpy()
-        segments.append(fake_audios)
+        codes_list.append(result.codes)
 
-    # Concatenate all audio segments and return
-    if len(segments) == 0:
+    # Decode the generated segments in bounded padded decoder batches and return
+    if len(codes_list) == 0:
         yield None, None, "No audio generated"
     else:
-        audio = np.concatenate(segments, axis=0)
+        segments = decode_vq_tokens_batch(
+            decoder_model=decoder_model,
+            codes_list=codes_list,
+        )
+        audio = np.concatenate(
+            [segment.float().cpu().numpy() for segment in segments], axis=0
+        )
         yield None, (24000, audio), None  # Assume a 24 kHz sample rate
@@ -212,6 +212,41 @@ def decode_vq_tokens(
     raise ValueError(f"Unknown model type: {type(decoder_model)}")
 
 
+def decode_vq_tokens_batch(
+    *,
+    decoder_model,
+    codes_list,
+    max_batch_size: int = 4,
+):
+    logger.info(f"VQ features: {[tuple(codes.shape) for codes in codes_list]}")
+
+    if not isinstance(decoder_model, FireflyArchitecture):
+        raise ValueError(f"Unknown model type: {type(decoder_model)}")
+
+    # VQGAN Inference, padded per batch and masked by feature_lengths. Segments
+    # are grouped by length so little is padded, and at most max_batch_size go
+    # through one decoder pass, which keeps peak memory independent of the
+    # total text length
+    order = sorted(range(len(codes_list)), key=lambda i: codes_list[i].shape[1])
+    audios = [None] * len(codes_list)
+    for start in range(0, len(order), max_batch_size):
+        batch = order[start : start + max_batch_size]
+        feature_lengths = torch.tensor(
+            [codes_list[i].shape[1] for i in batch], device=decoder_model.device
+        )
+        indices = torch.nn.utils.rnn.pad_sequence(
+            [codes_list[i].T for i in batch], batch_first=True
+        ).transpose(1, 2)
+        batch_audios, audio_lengths = decoder_model.decode(
+            indices=indices,
+            feature_lengths=feature_lengths,
+        )
+        for i, audio, length in zip(batch, batch_audios, audio_lengths.tolist()):
+            audios[i] = audio[..., :length].squeeze()
+
+    return audios
+
+
 routes = MultimethodRoutes(base_class=HttpView)
 
 
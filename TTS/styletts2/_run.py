@@ -2,10 +2,6 @@ from cached_path import cached_path
 
 from dp.phonemizer import Phonemizer
 
-print("NLTK")
-import nltk
-
-nltk.download("punkt")
 print("SCIPY")
 from scipy.io.wavfile import write
 
@@ -36,11 +32,10 @@ from torch import nn
 import torch.nn.functional as F
 import torchaudio
 import librosa
-from nltk.tokenize import word_tokenize
 
 from models import *
 from utils import *
-from text_utils import TextCleaner
+from text_utils import TextCleaner, tokenize_phonemes
 
 textclenaer = TextCleaner()
 
@@ -62,6 +57,25 @@ def length_to_mask(lengths):
     return mask
 
 
+def build_alignment(pred_dur):
+    # Expand per-token durations into a [tokens, frames] 0/1 alignment matrix
+    dur_long = pred_dur.long().reshape(-1)
+    # The frame count is read back once from the host copy and handed to
+    # repeat_interleave, which would otherwise sync again to size its output
+    total = int(dur_long.cpu().sum())
+    idx = torch.repeat_interleave(
+        torch.arange(dur_long.numel(), device=dur_long.device),
+        dur_long,
+        output_size=total,
+    )
+    return F.one_hot(idx, num_classes=dur_long.numel()).T.float()
+
+
+def shift_right(x):
+    # Shift frames right by one, repeating the first frame (hifigan alignment)
+    return F.pad(x[..., :-1], (1, 0), mode="replicate")
+
+
 def preprocess(wave):
     wave_tensor = torch.from_numpy(wave).float()
     mel_tensor = to_mel(wave_tensor)
@@ -160,8 +174,7 @@ sampler = DiffusionSampler(
 def inference(text, ref_s, alpha=0.3, beta=0.7, diffusion_steps=5, embedding_scale=1):
     text = text.strip()
     ps = phonemizer([text], lang="en_us")
-    ps = word_tokenize(ps[0])
-    ps = " ".join(ps)
+    ps = tokenize_phonemes(ps[0])
     tokens = textclenaer(ps)
     tokens.insert(0, 0)
     tokens = torch.LongTensor(tokens).to(device).unsqueeze(0)
@@ -196,28 +209,18 @@ def inference(text, ref_s, alpha=0.3, beta=0.7, diffusion_steps=5, embedding_sca
         duration = torch.sigmoid(duration).sum(axis=-1)
         pred_dur = torch.round(duration.squeeze()).clamp(min=1)
 
-        pred_aln_trg = torch.zeros(input_lengths, int(pred_dur.sum().data))
-        c_frame = 0
-        for i in range(pred_aln_trg.size(0)):
-            pred_aln_trg[i, c_frame : c_frame + int(pred_dur[i].data)] = 1
-            c_frame += int(pred_dur[i].data)
+        pred_aln_trg = build_alignment(pred_dur)
 
         # encode prosody
         en = d.transpose(-1, -2) @ pred_aln_trg.unsqueeze(0).to(device)
         if model_params.decoder.type == "hifigan":
-            asr_new = torch.zeros_like(en)
-            asr_new[:, :, 0] = en[:, :, 0]
-            asr_new[:, :, 1:] = en[:, :, 0:-1]
-            en = asr_new
+            en = shift_right(en)
 
         F0_pred, N_pred = model.predictor.F0Ntrain(en, s)
 
         asr = t_en @ pred_aln_trg.unsqueeze(0).to(device)
         if model_params.decoder.type == "hifigan":
-            asr_new = torch.zeros_like(asr)
-            asr_new[:, :, 0] = asr[:, :, 0]
-            asr_new[:, :, 1:] = asr[:, :, 0:-1]
-            asr = asr_new
+            asr = shift_right(asr)
 
         out = model.decoder(asr, F0_pred, N_pred, ref.squeeze().unsqueeze(0))
 
@@ -238,10 +241,7 @@ def LFinference(
 ):
     text = text.strip()
     ps = phonemizer([text], lang="en_us")
-    ps = word_tokenize(ps[0])
-    ps = " ".join(ps)
-    ps = ps.replace("``", '"')
-    ps = ps.replace("''", '"')
+    ps = tokenize_phonemes(ps[0])
 
     tokens = textclenaer(ps)
     tokens.insert(0, 0)
@@ -283,28 +283,18 @@ def LFinference(
         duration = torch.sigmoid(duration).sum(axis=-1)
         pred_dur = torch.round(duration.squeeze()).clamp(min=1)
 
-        pred_aln_trg = torch.zeros(input_lengths, int(pred_dur.sum().data))
-        c_frame = 0
-        for i in range(pred_aln_trg.size(0)):
-            pred_aln_trg[i, c_frame : c_frame + int(pred_dur[i].data)] = 1
-            c_frame += int(pred_dur[i].data)
+        pred_aln_trg = build_alignment(pred_dur)
 
         # encode prosody
         en = d.transpose(-1, -2) @ pred_aln_trg.unsqueeze(0).to(device)
         if model_params.decoder.type == "hifigan":
-            asr_new = torch.zeros_like(en)
-            asr_new[:, :, 0] = en[:, :, 0]
-            asr_new[:, :, 1:] = en[:, :, 0:-1]
-            en = asr_new
+            en = shift_right(en)
 
         F0_pred, N_pred = model.predictor.F0Ntrain(en, s)
 
         asr = t_en @ pred_aln_trg.unsqueeze(0).to(device)
         if model_params.decoder.type == "hifigan":
-            asr_new = torch.zeros_like(asr)
-            asr_new[:, :, 0] = asr[:, :, 0]
-            asr_new[:, :, 1:] = asr[:, :, 0:-1]
-            asr = asr_new
+            asr = shift_right(asr)
 
         out = model.decoder(asr, F0_pred, N_pred, ref.squeeze().unsqueeze(0))
 
@@ -319,8 +309,7 @@ def STinference(
 ):
     text = text.strip()
     ps = phonemizer([text], lang="en_us")
-    ps = word_tokenize(ps[0])
-    ps = " ".join(ps)
+    ps = tokenize_phonemes(ps[0])
 
     tokens = textclenaer(ps)
     tokens.insert(0, 0)
@@ -328,8 +317,7 @@ def STinference(
 
     ref_text = ref_text.strip()
     ps = phonemizer([ref_text], lang="en_us")
-    ps = word_tokenize(ps[0])
-    ps = " ".join(ps)
+    ps = tokenize_phonemes(ps[0])
 
     ref_tokens = textclenaer(ps)
     ref_tokens.insert(0, 0)
@@ -368,28 +356,18 @@ def STinference(
         duration = torch.sigmoid(duration).sum(axis=-1)
         pred_dur = torch.round(duration.squeeze()).clamp(min=1)
 
-        pred_aln_trg = torch.zeros(input_lengths, int(pred_dur.sum().data))
-        c_frame = 0
-        for i in range(pred_aln_trg.size(0)):
-            pred_aln_trg[i, c_frame : c_frame + int(pred_dur[i].data)] = 1
-            c_frame += int(pred_dur[i].data)
+        pred_aln_trg = build_alignment(pred_dur)
 
         # encode prosody
         en = d.transpose(-1, -2) @ pred_aln_trg.unsqueeze(0).to(device)
         if model_params.decoder.type == "hifigan":
-            asr_new = torch.zeros_like(en)
-            asr_new[:, :, 0] = en[:, :, 0]
-            asr_new[:, :, 1:] = en[:, :, 0:-1]
-            en = asr_new
+            en = shift_right(en)
 
         F0_pred, N_pred = model.predictor.F0Ntrain(en, s)
 
         asr = t_en @ pred_aln_trg.unsqueeze(0).to(device)
         if model_params.decoder.type == "hifigan":
-            asr_new = torch.zeros_like(asr)
-            asr_new[:, :, 0] = asr[:, :, 0]
-            asr_new[:, :, 1:] = asr[:, :, 0:-1]
-            asr = asr_new
+            asr = shift_right(asr)
 
         out = model.decoder(asr, F0_pred, N_pred, ref.squeeze().unsqueeze(0))
 
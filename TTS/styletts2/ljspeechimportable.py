@@ -1,5 +1,10 @@
+import hashlib
 import inspect
 import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import phonemizer
 import torch
 from cached_path import cached_path
@@ -8,35 +13,17 @@ from TTS.espeak_util import set_espeak_library
 import requests
 from pathlib import Path
 
-torch.manual_seed(0)
-torch.backends.cudnn.benchmark = False
-torch.backends.cudnn.deterministic = True
-
-import random
-
-random.seed(0)
-
-import numpy as np
-
-np.random.seed(0)
-
-import nltk
-
-nltk.download("punkt")
-nltk.download("punkt_tab")
-
 # load packages
 import random
 
-import librosa
 import numpy as np
 import torch
+import torch.nn.functional as F
 import torchaudio
 import yaml
-from nltk.tokenize import word_tokenize
 
 from .models import *
-from .text_utils import TextCleaner
+from .text_utils import TextCleaner, tokenize_phonemes
 from .utils import *
 
 def download_asr_model():
@@ -62,7 +49,6 @@ def download_asr_model():
             print(f"Error downloading ASR model: {e}")
             raise
 
-set_espeak_library()
 textclenaer = TextCleaner()
 
 # Define the cache directory
@@ -75,224 +61,433 @@ module_file = inspect.getfile(inspect.currentframe())
 # Get the directory of the current module
 module_dir = os.path.dirname(module_file)
 
-# Check and download ASR model
-download_asr_model()
-
 device = "cuda" if torch.cuda.is_available() else "cpu"
 
+# Seeding the global RNGs and pinning cuDNN algorithms affects every engine in
+# the process, so reproducible output is opt-in; otherwise cuDNN is left alone
+if os.getenv("STYLETTS2_DETERMINISTIC", "False").lower() == "true":
+    torch.manual_seed(0)
+    random.seed(0)
+    np.random.seed(0)
+    torch.backends.cudnn.benchmark = False
+    torch.backends.cudnn.deterministic = True
+
 to_mel = torchaudio.transforms.MelSpectrogram(
     n_mels=80, n_fft=2048, win_length=1200, hop_length=300
-)
+).to(device)
 mean, std = -4, 4
 
+# bf16 autocast for the encoders and predictor on GPUs that support it
+use_autocast = device == "cuda" and torch.cuda.is_bf16_supported()
+
+
+def autocast():
+    return torch.autocast(
+        device_type=device, dtype=torch.bfloat16, enabled=use_autocast
+    )
+
+
+# Dedicated generator so diffusion noise is drawn directly on the device
+_noise_gen = torch.Generator(device=device).manual_seed(0)
+
+
+def make_noise():
+    """Diffusion noise for inference/LFinference, allocated on the model device."""
+    return torch.randn((1, 1, 256), device=device, generator=_noise_gen)
+
 
 def length_to_mask(lengths):
-    mask = (
-        torch.arange(lengths.max())
-        .unsqueeze(0)
-        .expand(lengths.shape[0], -1)
-        .type_as(lengths)
+    positions = torch.arange(int(lengths.max()), device=lengths.device)
+    return (positions[None, :] + 1) > lengths[:, None]
+
+
+def build_alignment(pred_dur):
+    """Expand per-token durations into a [tokens, frames] alignment matrix."""
+    dur_long = pred_dur.long().reshape(-1)
+    # The frame count is read back once from the host copy and handed to
+    # repeat_interleave, which would otherwise sync again to size its output
+    total = int(dur_long.cpu().sum())
+    idx = torch.repeat_interleave(
+        torch.arange(dur_long.numel(), device=dur_long.device),
+        dur_long,
+        output_size=total,
     )
-    mask = torch.gt(mask + 1, lengths.unsqueeze(1))
-    return mask
+    return F.one_hot(idx, num_classes=dur_long.numel()).T.float()
 
 
 def preprocess(wave):
-    wave_tensor = torch.from_numpy(wave).float()
+    wave_tensor = torch.as_tensor(wave, dtype=torch.float32, device=device)
     mel_tensor = to_mel(wave_tensor)
     mel_tensor = (torch.log(1e-5 + mel_tensor.unsqueeze(0)) - mean) / std
     return mel_tensor
 
 
+def trim_silence(wave, top_db=30, frame_length=2048, hop_length=512):
+    """Cut leading/trailing frames quieter than top_db below the loudest frame."""
+    if wave.numel() < frame_length:
+        return wave
+    rms = wave.unfold(-1, frame_length, hop_length).pow(2).mean(-1).sqrt()
+    db = 20 * torch.log10(rms + 1e-10)
+    keep = torch.nonzero(db > db.max() - top_db).squeeze(-1)
+    if keep.numel() == 0:
+        return wave[:0]
+    start = int(keep[0]) * hop_length
+    end = min(wave.numel(), int(keep[-1]) * hop_length + frame_length)
+    return wave[start:end]
+
+
 def compute_style(ref_dicts):
+    load_models()
+    sample_rate, top_db = 24000, 30
     reference_embeddings = {}
     for key, path in ref_dicts.items():
-        wave, sr = librosa.load(path, sr=24000)
-        audio, index = librosa.effects.trim(wave, top_db=30)
-        if sr != 24000:
-            audio = librosa.resample(audio, sr, 24000)
-        mel_tensor = preprocess(audio).to(device)
-
-        with torch.no_grad():
+        # Reuse the embedding computed for identical audio on an earlier run;
+        # the preprocessing settings are part of the key so changing them
+        # doesn't serve stale entries
+        digest = hashlib.blake2b(Path(path).read_bytes(), digest_size=16)
+        digest.update(f"{sample_rate}:{top_db}".encode())
+        digest = digest.hexdigest()
+        cache_file = Path(cache_dir) / "style_cache" / f"{digest}.pt"
+        if cache_file.exists():
+            cached = torch.load(cache_file, map_location=device, weights_only=True)
+            reference_embeddings[key] = (cached["ref"], cached["audio"].cpu().numpy())
+            continue
+
+        wave, sr = torchaudio.load(path)
+        wave = wave.mean(0)
+        if sr != sample_rate:
+            wave = torchaudio.functional.resample(wave, sr, sample_rate)
+        audio = trim_silence(wave, top_db=top_db)
+        mel_tensor = preprocess(audio)
+
+        with torch.inference_mode():
             ref = model.style_encoder(mel_tensor.unsqueeze(1))
-        reference_embeddings[key] = (ref.squeeze(1), audio)
+        reference_embeddings[key] = (ref.squeeze(1), audio.numpy())
+
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # trim_silence returns a view, clone it so only the kept samples are stored
+        torch.save({"ref": ref.squeeze(1).cpu(), "audio": audio.clone()}, cache_file)
 
     return reference_embeddings
 
 
-global_phonemizer = phonemizer.backend.EspeakBackend(
-    language="en-us",
-    preserve_punctuation=True,
-    with_stress=True,
-    words_mismatch="ignore",
-)
+# espeak keeps global state, but phonemizer loads a private copy of the
+# library per backend, so separate backends can run side by side. Up to
+# ESPEAK_POOL_SIZE are built on demand and each is used by one thread at a time,
+# letting the prefetch thread and a request phonemize concurrently
+ESPEAK_POOL_SIZE = max(1, int(os.getenv("STYLETTS2_ESPEAK_POOL", "2")))
+_phonemizer_pool = queue.LifoQueue()
+_phonemizer_count = 0
+_phonemizer_pool_lock = threading.Lock()
+
+# Phonemized strings keyed by cleaned text, oldest evicted first
+_phoneme_cache = OrderedDict()
+PHONEME_CACHE_SIZE = 4096
+# The cache is shared with prefetch threads
+_phoneme_lock = threading.Lock()
+
+
+def _acquire_phonemizer():
+    """Take an idle espeak backend from the pool, creating one if under the limit."""
+    global _phonemizer_count
+    try:
+        return _phonemizer_pool.get_nowait()
+    except queue.Empty:
+        pass
+
+    with _phonemizer_pool_lock:
+        if _phonemizer_count < ESPEAK_POOL_SIZE:
+            if _phonemizer_count == 0:
+                set_espeak_library()
+            backend = phonemizer.backend.EspeakBackend(
+                language="en-us",
+                preserve_punctuation=True,
+                with_stress=True,
+                words_mismatch="ignore",
+            )
+            _phonemizer_count += 1
+            return backend
+
+    # Every backend is busy; wait for one to be handed back
+    return _phonemizer_pool.get()
 
-# phonemizer = Phonemizer.from_checkpoint(str(cached_path('https://public-asai-dl-models.s3.eu-central-1.amazonaws.com/DeepPhonemizer/en_us_cmudict_ipa_forward.pt')))
 
-# check if Model folder and model files exist else download it or use cache
+def _phonemize(texts):
+    backend = _acquire_phonemizer()
+    try:
+        phonemes = backend.phonemize(texts)
+    finally:
+        _phonemizer_pool.put(backend)
+    return [tokenize_phonemes(ps) for ps in phonemes]
 
-config = yaml.safe_load(
-    open(
-        str(
-            cached_path(
-                "hf://yl4579/StyleTTS2-LJSpeech/Models/LJSpeech/config.yml",
-                cache_dir=cache_dir,
-            )
-        )
-    )
-)
 
-# load pretrained ASR model
-ASR_config = config.get("ASR_config", False)
-ASR_path = os.path.join(module_dir, config.get("ASR_path", False))
-text_aligner = load_ASR_models(ASR_path, ASR_config)
+def phonemize_texts(texts):
+    """Phonemize texts, sending only cache misses to espeak in a single call."""
+    with _phoneme_lock:
+        misses = [text for text in dict.fromkeys(texts) if text not in _phoneme_cache]
+    if misses:
+        phonemes = _phonemize(misses)
+        with _phoneme_lock:
+            for text, ps in zip(misses, phonemes):
+                _phoneme_cache[text] = ps
+                if len(_phoneme_cache) > PHONEME_CACHE_SIZE:
+                    _phoneme_cache.popitem(last=False)
+
+    with _phoneme_lock:
+        found = {}
+        for text in dict.fromkeys(texts):
+            if text in _phoneme_cache:
+                _phoneme_cache.move_to_end(text)
+                found[text] = _phoneme_cache[text]
+
+    # Texts evicted by this same batch are phonemized again without caching
+    evicted = [text for text in dict.fromkeys(texts) if text not in found]
+    if evicted:
+        found.update(zip(evicted, _phonemize(evicted)))
+    return [found[text] for text in texts]
+
+
+def clean_text(text):
+    return text.strip().replace('"', "")
+
+
+def prefetch_phonemes(texts):
+    """Phonemize texts into the cache ahead of the inference call that needs them."""
+    phonemize_texts([clean_text(text) for text in texts])
+
+
+# phonemizer = Phonemizer.from_checkpoint(str(cached_path('https://public-asai-dl-models.s3.eu-central-1.amazonaws.com/DeepPhonemizer/en_us_cmudict_ipa_forward.pt')))
 
-# load pretrained F0 model
-F0_path = os.path.join(module_dir, config.get("F0_path", False))
-pitch_extractor = load_F0_models(F0_path)
+from .Modules.diffusion.sampler import ADPM2Sampler, DiffusionSampler, KarrasSchedule
 
-# load BERT model
-from .Utils.PLBERT.util import load_plbert
+# Built on first use by load_models() so importing this module stays cheap
+model = None
+sampler = None
 
-BERT_path = os.path.join(module_dir, config.get("PLBERT_dir", False))
-plbert = load_plbert(BERT_path)
 
-model = build_model(
-    recursive_munch(config["model_params"]), text_aligner, pitch_extractor, plbert
-)
-_ = [model[key].eval() for key in model]
-_ = [model[key].to(device) for key in model]
+def load_models():
+    """Download (if needed) and build the StyleTTS2 model and diffusion sampler."""
+    global model, sampler
+    if model is not None:
+        return
 
-params_whole = torch.load(
-    str(
-        cached_path(
+    # check if Model folder and model files exist else download it or use cache;
+    # the fetches run concurrently so a cold start waits on the slowest only
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        asr_future = executor.submit(download_asr_model)
+        config_future = executor.submit(
+            cached_path,
+            "hf://yl4579/StyleTTS2-LJSpeech/Models/LJSpeech/config.yml",
+            cache_dir=cache_dir,
+        )
+        checkpoint_future = executor.submit(
+            cached_path,
             "hf://yl4579/StyleTTS2-LJSpeech/Models/LJSpeech/epoch_2nd_00100.pth",
             cache_dir=cache_dir,
         )
-    ),
-    map_location="cpu",
-)
-params = params_whole["net"]
-
-for key in model:
-    if key in params:
-        print("%s loaded" % key)
-        try:
-            model[key].load_state_dict(params[key])
-        except:
-            from collections import OrderedDict
-
-            state_dict = params[key]
-            new_state_dict = OrderedDict()
-            for k, v in state_dict.items():
-                name = k[7:]  # remove `module.`
-                new_state_dict[name] = v
-            # load params
-            model[key].load_state_dict(new_state_dict, strict=False)
-#             except:
-#                 _load(params[key], model[key])
-_ = [model[key].eval() for key in model]
+        asr_future.result()
+        config_path = config_future.result()
+        checkpoint_path = checkpoint_future.result()
 
-from .Modules.diffusion.sampler import ADPM2Sampler, DiffusionSampler, KarrasSchedule
+    with open(str(config_path)) as f:
+        config = yaml.safe_load(f)
 
-sampler = DiffusionSampler(
-    model.diffusion.diffusion,
-    sampler=ADPM2Sampler(),
-    sigma_schedule=KarrasSchedule(
-        sigma_min=0.0001, sigma_max=3.0, rho=9.0
-    ),  # empirical parameters
-    clamp=False,
-)
+    # load pretrained ASR model
+    ASR_config = config.get("ASR_config", False)
+    ASR_path = os.path.join(module_dir, config.get("ASR_path", False))
+    text_aligner = load_ASR_models(ASR_path, ASR_config)
 
+    # load pretrained F0 model
+    F0_path = os.path.join(module_dir, config.get("F0_path", False))
+    pitch_extractor = load_F0_models(F0_path)
 
-def inference(
-    text, noise, diffusion_steps=5, embedding_scale=1, speed: Optional[float] = 1.3
-):
-    text = text.strip()
-    text = text.replace('"', "")
-    ps = global_phonemizer.phonemize([text])
-    ps = word_tokenize(ps[0])
-    ps = " ".join(ps)
+    # load BERT model
+    from .Utils.PLBERT.util import load_plbert
 
-    tokens = textclenaer(ps)
-    tokens.insert(0, 0)
+    BERT_path = os.path.join(module_dir, config.get("PLBERT_dir", False))
+    plbert = load_plbert(BERT_path)
 
-    # Truncate tokens to the maximum sequence length allowed by the model
-    max_seq_length = 512
-    tokens = tokens[:max_seq_length]
+    net = build_model(
+        recursive_munch(config["model_params"]), text_aligner, pitch_extractor, plbert
+    )
+    _ = [net[key].to(device) for key in net]
+
+    # mmap keeps the checkpoint on disk; load_state_dict copies straight from it
+    params = torch.load(
+        str(checkpoint_path),
+        map_location="cpu",
+        mmap=True,
+        weights_only=True,
+    )["net"]
+
+    for key in net:
+        if key in params:
+            print("%s loaded" % key)
+            try:
+                net[key].load_state_dict(params[key])
+            except:
+                state_dict = params[key]
+                new_state_dict = OrderedDict()
+                for k, v in state_dict.items():
+                    name = k[7:]  # remove `module.`
+                    new_state_dict[name] = v
+                # load params
+                net[key].load_state_dict(new_state_dict, strict=False)
+    _ = [net[key].eval() for key in net]
+
+    if device == "cuda" and os.getenv("STYLETTS2_COMPILE", "False").lower() == "true":
+        # Dynamic shapes so a new text length doesn't trigger a recompile
+        for key in ("text_encoder", "bert_encoder", "decoder"):
+            net[key] = torch.compile(net[key], dynamic=True)
+        net.predictor.text_encoder = torch.compile(
+            net.predictor.text_encoder, dynamic=True
+        )
+        # The sampler repeats the same denoiser call every step; reduce-overhead
+        # replays it from a CUDA graph captured once per embedding length
+        net.diffusion.diffusion.net = torch.compile(
+            net.diffusion.diffusion.net, mode="reduce-overhead"
+        )
 
-    tokens = torch.LongTensor(tokens).to(device).unsqueeze(0)
+    sampler = DiffusionSampler(
+        net.diffusion.diffusion,
+        sampler=ADPM2Sampler(),
+        sigma_schedule=KarrasSchedule(
+            sigma_min=0.0001, sigma_max=3.0, rho=9.0
+        ),  # empirical parameters
+        clamp=False,
+    )
+    model = net
 
-    with torch.no_grad():
-        input_lengths = torch.LongTensor([tokens.shape[-1]]).to(tokens.device)
-        text_mask = length_to_mask(input_lengths).to(tokens.device)
 
-        t_en = model.text_encoder(tokens, input_lengths, text_mask)
-        bert_dur = model.bert(tokens, attention_mask=(~text_mask).int())
-        d_en = model.bert_encoder(bert_dur).transpose(-1, -2)
+def encode_texts(texts, max_seq_length=None):
+    """Phonemize, tokenize and encode a batch of texts in one pass.
 
-        s_pred = sampler(
-            noise,
-            embedding=bert_dur[0].unsqueeze(0),
-            num_steps=diffusion_steps,
-            embedding_scale=embedding_scale,
-        ).squeeze(0)
+    Returns the padded tokens together with the device lengths, the same
+    lengths as a host list, the mask and the text/BERT encodings so callers
+    can pick out per-item slices without reading anything back from the GPU.
+    """
+    texts = [clean_text(text) for text in texts]
+    phonemes = phonemize_texts(texts)
 
-        s = s_pred[:, 128:]
-        ref = s_pred[:, :128]
+    token_list = []
+    for ps in phonemes:
+        # Stays an int64 array end to end so the tensor shares its memory
+        tokens = np.concatenate(([0], textclenaer.encode(ps)))
+        if max_seq_length:
+            tokens = tokens[:max_seq_length]
+        token_list.append(torch.from_numpy(tokens))
 
-        d = model.predictor.text_encoder(d_en, s, input_lengths, text_mask)
+    # Lengths and mask are built on the host so nothing waits on the GPU here
+    lengths = [len(tokens) for tokens in token_list]
+    input_lengths = torch.LongTensor(lengths)
+    text_mask = length_to_mask(input_lengths).to(device)
+    input_lengths = input_lengths.to(device)
+    tokens = torch.nn.utils.rnn.pad_sequence(token_list, batch_first=True).to(device)
 
-        x, _ = model.predictor.lstm(d)
-        duration = model.predictor.duration_proj(x)
-        duration = (
-            torch.sigmoid(duration).sum(axis=-1) / speed
-        )  # adjust speed by dividing through a number e.g. 1.25 = 25& faster
-        pred_dur = torch.round(duration.squeeze()).clamp(min=1)
+    t_en = model.text_encoder(tokens, input_lengths, text_mask)
+    bert_dur = model.bert(tokens, attention_mask=(~text_mask).long())
+    d_en = model.bert_encoder(bert_dur).transpose(-1, -2)
 
-        pred_dur[-1] += 5
+    return tokens, input_lengths, lengths, text_mask, t_en, bert_dur, d_en
 
-        pred_aln_trg = torch.zeros(input_lengths, int(pred_dur.sum().data))
-        c_frame = 0
-        for i in range(pred_aln_trg.size(0)):
-            pred_aln_trg[i, c_frame : c_frame + int(pred_dur[i].data)] = 1
-            c_frame += int(pred_dur[i].data)
 
-        # encode prosody
-        en = d.transpose(-1, -2) @ pred_aln_trg.unsqueeze(0).to(device)
-        F0_pred, N_pred = model.predictor.F0Ntrain(en, s)
-        out = model.decoder(
-            (t_en @ pred_aln_trg.unsqueeze(0).to(device)),
-            F0_pred,
-            N_pred,
-            ref.squeeze().unsqueeze(0),
+def inference_batch(
+    texts, noise, diffusion_steps=5, embedding_scale=1, speed: Optional[float] = 1.3
+):
+    """Synthesize several texts, sharing the encoder passes across the batch.
+
+    The style sampler, duration LSTM and decoder run per item on the unpadded
+    slices so each waveform matches what inference() returns for that text.
+    """
+    load_models()
+    waves = []
+    with torch.inference_mode():
+        with autocast():
+            # Truncate tokens to the maximum sequence length allowed by the model
+            tokens, input_lengths, lengths, text_mask, t_en, bert_dur, d_en = (
+                encode_texts(texts, max_seq_length=512)
+            )
+
+        # The diffusion sampler stays in fp32
+        s_pred = torch.cat(
+            [
+                sampler(
+                    noise,
+                    embedding=bert_dur[i : i + 1, :n].float(),
+                    num_steps=diffusion_steps,
+                    embedding_scale=embedding_scale,
+                ).squeeze(0)
+                for i, n in enumerate(lengths)
+            ]
         )
 
-    return out.squeeze().cpu().numpy()
+        s = s_pred[:, 128:]
+        ref = s_pred[:, :128]
 
+        with autocast():
+            d = model.predictor.text_encoder(d_en, s, input_lengths, text_mask)
+
+        for i, n in enumerate(lengths):
+            with autocast():
+                x, _ = model.predictor.lstm(d[i : i + 1, :n])
+                duration = model.predictor.duration_proj(x).float()
+            duration = (
+                torch.sigmoid(duration).sum(axis=-1) / speed
+            )  # adjust speed by dividing through a number e.g. 1.25 = 25& faster
+            pred_dur = torch.round(duration[0]).clamp(min=1)
+
+            pred_dur[-1] += 5
+
+            # Built on the device already, batch dim added once for both matmuls
+            aln = build_alignment(pred_dur).unsqueeze(0)
+
+            # encode prosody
+            with autocast():
+                en = d[i : i + 1, :n].transpose(-1, -2) @ aln
+                F0_pred, N_pred = model.predictor.F0Ntrain(en, s[i : i + 1])
+            out = model.decoder(
+                (t_en[i : i + 1, :, :n].float() @ aln),
+                F0_pred.float(),
+                N_pred.float(),
+                ref[i : i + 1],
+            )
+            waves.append(out.squeeze())
 
-def LFinference(text, s_prev, noise, alpha=0.7, diffusion_steps=5, embedding_scale=1):
-    text = text.strip()
-    text = text.replace('"', "")
-    ps = global_phonemizer.phonemize([text])
-    ps = word_tokenize(ps[0])
-    ps = " ".join(ps)
+        # One device-side concat and a single copy back for the whole batch,
+        # split into per-item views on the host
+        full = torch.cat(waves)
+        if device == "cuda":
+            host = torch.empty(full.shape, dtype=full.dtype, pin_memory=True)
+            host.copy_(full, non_blocking=True)
+            torch.cuda.current_stream().synchronize()
+            full = host
 
-    tokens = textclenaer(ps)
-    tokens.insert(0, 0)
-    tokens = torch.LongTensor(tokens).to(device).unsqueeze(0)
+    return [wave.numpy() for wave in full.split([len(wave) for wave in waves])]
 
-    with torch.no_grad():
-        input_lengths = torch.LongTensor([tokens.shape[-1]]).to(tokens.device)
-        text_mask = length_to_mask(input_lengths).to(tokens.device)
 
-        t_en = model.text_encoder(tokens, input_lengths, text_mask)
-        bert_dur = model.bert(tokens, attention_mask=(~text_mask).int())
-        d_en = model.bert_encoder(bert_dur).transpose(-1, -2)
+def inference(
+    text, noise, diffusion_steps=5, embedding_scale=1, speed: Optional[float] = 1.3
+):
+    return inference_batch(
+        [text],
+        noise,
+        diffusion_steps=diffusion_steps,
+        embedding_scale=embedding_scale,
+        speed=speed,
+    )[0]
+
+
+def LFinference(text, s_prev, noise, alpha=0.7, diffusion_steps=5, embedding_scale=1):
+    load_models()
+    with torch.inference_mode():
+        with autocast():
+            tokens, input_lengths, lengths, text_mask, t_en, bert_dur, d_en = (
+                encode_texts([text])
+            )
 
         s_pred = sampler(
             noise,
-            embedding=bert_dur[0].unsqueeze(0),
+            embedding=bert_dur[0].unsqueeze(0).float(),
             num_steps=diffusion_steps,
             embedding_scale=embedding_scale,
         ).squeeze(0)
@@ -304,27 +499,34 @@ def LFinference(text, s_prev, noise, alpha=0.7, diffusion_steps=5, embedding_sca
         s = s_pred[:, 128:]
         ref = s_pred[:, :128]
 
-        d = model.predictor.text_encoder(d_en, s, input_lengths, text_mask)
+        with autocast():
+            d = model.predictor.text_encoder(d_en, s, input_lengths, text_mask)
 
-        x, _ = model.predictor.lstm(d)
-        duration = model.predictor.duration_proj(x)
+            x, _ = model.predictor.lstm(d)
+            duration = model.predictor.duration_proj(x).float()
         duration = torch.sigmoid(duration).sum(axis=-1)
-        pred_dur = torch.round(duration.squeeze()).clamp(min=1)
+        pred_dur = torch.round(duration[0]).clamp(min=1)
 
-        pred_aln_trg = torch.zeros(input_lengths, int(pred_dur.sum().data))
-        c_frame = 0
-        for i in range(pred_aln_trg.size(0)):
-            pred_aln_trg[i, c_frame : c_frame + int(pred_dur[i].data)] = 1
-            c_frame += int(pred_dur[i].data)
+        aln = build_alignment(pred_dur).unsqueeze(0)
 
         # encode prosody
-        en = d.transpose(-1, -2) @ pred_aln_trg.unsqueeze(0).to(device)
-        F0_pred, N_pred = model.predictor.F0Ntrain(en, s)
+        with autocast():
+            en = d.transpose(-1, -2) @ aln
+            F0_pred, N_pred = model.predictor.F0Ntrain(en, s)
         out = model.decoder(
-            (t_en @ pred_aln_trg.unsqueeze(0).to(device)),
-            F0_pred,
-            N_pred,
+            (t_en.float() @ aln),
+            F0_pred.float(),
+            N_pred.float(),
             ref.squeeze().unsqueeze(0),
         )
 
     return out.squeeze().cpu().numpy(), s_pred
+
+
+def warmup(runs=2):
+    """Load the model and run a short dummy synthesis so cuDNN autotuning and
+    any torch.compile work happen before the first real request."""
+    load_models()
+    noise = torch.zeros((1, 1, 256), device=device)
+    for _ in range(runs):
+        inference_batch(["This is a warm up sentence."], noise)
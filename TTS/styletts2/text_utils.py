@@ -1,4 +1,9 @@
 # IPA Phonemizer: https://github.com/bootphon/phonemizer
+import logging
+import re
+
+import numpy as np
+from phonemizer.punctuation import Punctuation
 
 _pad = "$"
 _punctuation = ';:,.!?¡¿—…"«»“” '
@@ -13,16 +18,43 @@ for i in range(len((symbols))):
     dicts[symbols[i]] = i
 
 
+logger = logging.getLogger(__name__)
+
+# Known symbols are translated to consecutive private-use codepoints so a
+# whole string can be mapped to indexes in one pass
+_PUA_BASE = 0xE000
+
+
 class TextCleaner:
     def __init__(self, dummy=None):
         self.word_index_dictionary = dicts
-        print(len(dicts))
+        self.translate_table = str.maketrans(
+            {char: chr(_PUA_BASE + index) for char, index in dicts.items()}
+        )
+        logger.debug(f"{len(dicts)} symbols")
+
+    def encode(self, text):
+        """Return the symbol indexes of text as an int64 array."""
+        codes = np.frombuffer(
+            text.translate(self.translate_table).encode("utf-32-le"), dtype=np.uint32
+        )
+        # Unknown characters keep their codepoint and fall outside the range
+        indexes = codes - _PUA_BASE
+        known = indexes < len(symbols)
+        if not known.all():
+            logger.debug(f"Dropping unknown symbols from: {text}")
+        return indexes[known].astype(np.int64)
 
     def __call__(self, text):
-        indexes = []
-        for char in text:
-            try:
-                indexes.append(self.word_index_dictionary[char])
-            except KeyError:
-                print(text)
-        return indexes
+        return self.encode(text).tolist()
+
+
+# Splits punctuation off phonemized words the way NLTK's word_tokenize did,
+# without loading its punkt data. The class is phonemizer's own preserved set,
+# so every mark espeak passes through (brackets included) becomes its own token
+_punct = re.escape(Punctuation.default_marks())
+phoneme_token_pattern = re.compile(rf"\.\.\.|[{_punct}]|[^\s{_punct}]+")
+
+
+def tokenize_phonemes(ps):
+    return " ".join(phoneme_token_pattern.findall(ps))
@@ -1,6 +1,8 @@
 import asyncio
 import threading
 import concurrent.futures
+import io
+import json
 import logging
 import os
 import platform
@@ -9,14 +11,12 @@ import shutil
 import subprocess
 import tempfile
 from abc import ABC, abstractmethod
-from tempfile import NamedTemporaryFile
 from typing import List, Optional, Tuple, Generator
 from huggingface_hub import snapshot_download
 import numpy as np
 import torch
 from edge_tts import Communicate, SubMaker, VoicesManager
 from pydub import AudioSegment
-from scipy.io.wavfile import write
 from tqdm import tqdm
 from txtsplit import txtsplit
 from database.crud import (
@@ -30,11 +30,10 @@ from database.crud import (
 
 from TTS.tts_utils import format_percentage
 from llm.LLM_calls import generate_title
-from TTS.F5_TTS.F5 import get_available_voices as f5_get_voices
-from TTS.F5_TTS.F5 import infer, load_transcript
 from utils.common_utils import (
     add_mp3_tags,
     get_output_files,
+    split_text,
     write_markdown_file,
 )
 from utils.env import setup_env
@@ -183,83 +182,116 @@ class TTSEngine(ABC):
 
 
 class EdgeTTSEngine(TTSEngine):
+    # The voice list is static for the life of the process, so it is fetched
+    # from Microsoft once and shared by every instance
+    _voices_cache: Optional[List[str]] = None
+    _voices_lock: Optional[asyncio.Lock] = None
+
     async def get_available_voices(self) -> List[str]:
-        voices = await VoicesManager.create()
-        return [
-            voice_info["Name"]
-            for voice_info in voices.voices
-            if "MultilingualNeural" in voice_info["Name"]
-            and "en-US" in voice_info["Name"]
-        ]
+        cls = type(self)
+        if cls._voices_cache is None:
+            # Created on first use so it belongs to the running event loop
+            if cls._voices_lock is None:
+                cls._voices_lock = asyncio.Lock()
+            async with cls._voices_lock:
+                if cls._voices_cache is None:
+                    voices = await VoicesManager.create()
+                    cls._voices_cache = [
+                        voice_info["Name"]
+                        for voice_info in voices.voices
+                        if "MultilingualNeural" in voice_info["Name"]
+                        and "en-US" in voice_info["Name"]
+                    ]
+        return list(cls._voices_cache)
+
+    # Long texts are split into pieces of about this many words, synthesized
+    # over separate connections with at most `concurrency` in flight
+    chunk_words = 300
+    concurrency = 4
 
     async def generate_audio(
         self, text: str, voice_id: str, speed: Optional[float] = 1.0
     ) -> Tuple[AudioSegment, Optional[str]]:
-        # Create temp files but don't use context manager
-        temp_audio = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
-        temp_vtt = tempfile.NamedTemporaryFile(suffix=".vtt", delete=False)
-
-        try:
-            # Convert the floating point speed value to str e.g. "+10%"
-            if not speed:
-                speed = 1.0
-            rate = format_percentage(speed)
-
-            # Create communicate object
-            communicate = Communicate(text, voice_id, rate=rate)
-            submaker = SubMaker()
-
-            # Generate audio and save to temp file
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    temp_audio.write(chunk["data"])
-                elif chunk["type"] == "WordBoundary":
-                    # Handle SSML timing data if needed
-                    submaker.create_sub(
-                        (chunk["offset"], chunk["duration"]), chunk["text"]
-                    )
-                    with open(temp_vtt.name, "w", encoding="utf-8") as f:
-                        f.write(submaker.generate_subs())
-
-            temp_audio.flush()
-            temp_audio.close()  # Close file before reading
-            audio = AudioSegment.from_file(temp_audio.name)
-
-            # Read VTT content
-            with open(temp_vtt.name, "r", encoding="utf-8") as f:
-                vtt_content = f.read()
-
-            # Create permanent VTT file if needed
-            vtt_file = None
-            if vtt_content.strip():
-                vtt_file = temp_vtt.name
-                temp_vtt = None  # Don't delete the VTT file since we're using it
-
-            return audio, vtt_file
-
-        finally:
-            # Clean up temp files
-            try:
-                if temp_audio:
-                    temp_audio.close()
-                    os.unlink(temp_audio.name)
-            except Exception as e:
-                logger.warning(f"Failed to delete temp audio file: {e}")
-
-            try:
-                if temp_vtt:  # Only delete if we didn't keep it as vtt_file
-                    temp_vtt.close()
-                    os.unlink(temp_vtt.name)
-            except Exception as e:
-                logger.warning(f"Failed to delete temp VTT file: {e}")
+        # Convert the floating point speed value to str e.g. "+10%"
+        if not speed:
+            speed = 1.0
+        rate = format_percentage(speed)
+
+        chunks = [
+            chunk
+            for chunk in split_text(text, max_words=self.chunk_words)
+            if chunk.strip()
+        ]
+        if not chunks:
+            raise ValueError("No text to synthesize with EdgeTTS")
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def synthesize(chunk: str):
+            audio_data = bytearray()
+            word_boundaries = []
+            async with semaphore:
+                communicate = Communicate(chunk, voice_id, rate=rate)
+                async for message in communicate.stream():
+                    if message["type"] == "audio":
+                        audio_data.extend(message["data"])
+                    elif message["type"] == "WordBoundary":
+                        word_boundaries.append(
+                            (message["offset"], message["duration"], message["text"])
+                        )
+            # Decode off the event loop so the other streams keep flowing
+            segment = await asyncio.to_thread(
+                AudioSegment.from_file, io.BytesIO(audio_data), format="mp3"
+            )
+            return segment, word_boundaries
+
+        results = await asyncio.gather(*(synthesize(chunk) for chunk in chunks))
+
+        # Every piece has the same format, so the PCM is joined in one go
+        segments = [segment for segment, _ in results]
+        audio = segments[0]._spawn(b"".join(seg.raw_data for seg in segments))
+
+        # Word boundaries are relative to their own piece; shift them by the
+        # length of the audio before it (offsets are in 100ns units)
+        submaker = SubMaker()
+        has_subs = False
+        chunk_offset = 0
+        for segment, word_boundaries in results:
+            for offset, duration, word in word_boundaries:
+                has_subs = True
+                submaker.create_sub((chunk_offset + offset, duration), word)
+            chunk_offset += round(segment.frame_count() / segment.frame_rate * 10**7)
+
+        # Render the subtitles once, after all word boundaries are known; the
+        # file write happens off the event loop and only when there is content
+        vtt_file = None
+        vtt_content = submaker.generate_subs() if has_subs else ""
+        if vtt_content.strip():
+            vtt_file = await asyncio.to_thread(self._write_vtt, vtt_content)
+
+        return audio, vtt_file
+
+    @staticmethod
+    def _write_vtt(vtt_content: str) -> str:
+        """Write the subtitles to a temp file that export_audio later moves into place."""
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".vtt", delete=False, encoding="utf-8"
+        ) as temp_vtt:
+            temp_vtt.write(vtt_content)
+        return temp_vtt.name
 
 
 class F5TTSEngine(TTSEngine):
-    def __init__(self, voice_dir: str):
+    def __init__(self, voice_dir: str, batch_size: int = 4):
         self.voice_dir = voice_dir
+        # Number of text chunks sampled together in one padded CFM call
+        self.batch_size = batch_size
         self.logger = logging.getLogger(__name__)
 
     async def get_available_voices(self) -> List[str]:
+        # Imported here so that loading the engines module doesn't pull in
+        # F5-TTS and its vocoder unless F5 is actually used
+        from .F5_TTS.F5 import get_available_voices as f5_get_voices
+
         try:
             voices = f5_get_voices(self.voice_dir)
             self.logger.info(f"Found {len(voices)} voices in {self.voice_dir}")
@@ -271,22 +303,25 @@ class F5TTSEngine(TTSEngine):
     async def generate_audio(
         self, text: str, voice_id: str, speed: Optional[float] = 1.0
     ) -> Tuple[AudioSegment, None]:
+        from .F5_TTS.F5 import infer_batch, load_transcript
+
         try:
             if not speed:
                 speed = 1.0
             audio_path = os.path.join(self.voice_dir, voice_id)
             self.logger.info(f"Generating audio using voice: {audio_path}")
             ref_text = load_transcript(voice_id, self.voice_dir)
-            audio, _ = infer(
+            # The text's chunks share the reference, so they are sampled in
+            # padded batches instead of one CFM call per chunk
+            (sr, audio_data), = infer_batch(
                 audio_path,
                 ref_text,
-                text,
+                [text],
                 model="F5-TTS",
                 remove_silence=True,
                 speed=speed,
+                batch_size=self.batch_size,
             )
-
-            sr, audio_data = audio
             if audio_data is None:
                 raise ValueError(f"F5-TTS returned None for voice {voice_id}")
 
@@ -383,41 +418,46 @@ class PiperTTSEngine(TTSEngine):
                 )
                 raise FileNotFoundError("Piper model or JSON file missing")
 
-            # Use a temporary file for the output audio
-            with NamedTemporaryFile(suffix=".wav", delete=False) as temp_audio:
-                temp_audio_path = temp_audio.name
+            # Raw output has no header, so the sample rate comes from the voice config
+            with open(json_path, "r", encoding="utf-8") as config_file:
+                sample_rate = json.load(config_file)["audio"]["sample_rate"]
 
-            # Construct and execute the Piper command
+            # Construct and execute the Piper command; the 16-bit mono PCM is
+            # read straight from stdout instead of a temporary WAV file
             command = [
                 piper_binary,
                 "-m",
                 model_path,
                 "-c",
                 json_path,
-                "-f",
-                temp_audio_path,
+                "--output_raw",
                 "-s",
                 "0",  # Example: using voice index 0 for multi-voice models
                 "--length_scale",
                 f"{speed}",  # Set length scale (speed of speech)
             ]
 
-            process = subprocess.run(
-                command,
-                input=text.encode("utf-8"),
+            # Run Piper as an asyncio subprocess so other requests keep being
+            # served while it synthesizes
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
             )
+            stdout, stderr = await process.communicate(text.encode("utf-8"))
 
             # Check if the process completed successfully
             if process.returncode != 0:
-                self.logger.error(
-                    f"Piper TTS command failed: {process.stderr.decode()}"
-                )
+                self.logger.error(f"Piper TTS command failed: {stderr.decode()}")
                 raise RuntimeError("Piper TTS synthesis failed")
 
-            # Load generated audio file into AudioSegment
-            audio = AudioSegment.from_file(temp_audio_path, format="wav")
+            audio = AudioSegment(
+                data=stdout,
+                sample_width=2,  # 16-bit
+                frame_rate=sample_rate,
+                channels=1,  # mono
+            )
             self.logger.info(f"Generated Piper TTS audio for voice_id {voice_id}")
             return audio, None
         except Exception as e:
@@ -426,7 +466,9 @@ class PiperTTSEngine(TTSEngine):
 
 
 class StyleTTS2Engine(TTSEngine):
-    def __init__(self):
+    def __init__(self, batch_size: int = 8):
+        # Number of txtsplit segments synthesized per inference_batch call
+        self.batch_size = batch_size
         self.logger = logging.getLogger(__name__)
 
     async def get_available_voices(self) -> List[str]:
@@ -438,7 +480,11 @@ class StyleTTS2Engine(TTSEngine):
     async def generate_audio(
         self, text: str, voice_id: str, speed: Optional[float] = 1.3
     ) -> Tuple[AudioSegment, None]:
-        from .styletts2.ljspeechimportable import inference
+        from .styletts2.ljspeechimportable import (
+            inference_batch,
+            make_noise,
+            prefetch_phonemes,
+        )
 
         try:
             # Ensure the text is valid and within length limits
@@ -453,34 +499,59 @@ class StyleTTS2Engine(TTSEngine):
             # Split the text and synthesize each segment
             texts = txtsplit(text)
             audios = []
-            noise = torch.randn(1, 1, 256).to(
-                "cuda" if torch.cuda.is_available() else "cpu"
-            )
+            noise = make_noise()
 
-            for t in tqdm(texts, desc="Synthesizing with StyleTTS2"):
-                audio_segment = inference(
-                    t,
-                    noise,
-                    diffusion_steps=5,
-                    embedding_scale=1,
-                    speed=speed if speed else 1.3,
-                )
-                if audio_segment is not None:
-                    audios.append(audio_segment)
-                else:
-                    self.logger.error(f"Inference returned None for text segment: {t}")
+            # Encode a few segments per call so the text encoders run batched
+            batches = [
+                texts[i : i + self.batch_size]
+                for i in range(0, len(texts), self.batch_size)
+            ]
+            # Phonemize the next batch on a worker thread while the current
+            # one is on the GPU, so espeak stays off the critical path
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as prefetcher:
+                pending = prefetcher.submit(prefetch_phonemes, batches[0])
+                for i, batch in enumerate(
+                    tqdm(batches, desc="Synthesizing with StyleTTS2")
+                ):
+                    pending.result()
+                    if i + 1 < len(batches):
+                        pending = prefetcher.submit(prefetch_phonemes, batches[i + 1])
+                    audio_segments = inference_batch(
+                        batch,
+                        noise,
+                        diffusion_steps=5,
+                        embedding_scale=1,
+                        speed=speed if speed else 1.3,
+                    )
+                    for t, audio_segment in zip(batch, audio_segments):
+                        if audio_segment is not None:
+                            audios.append(audio_segment)
+                        else:
+                            self.logger.error(
+                                f"Inference returned None for text segment: {t}"
+                            )
 
             if not audios:
                 raise ValueError("No audio segments were generated")
 
-            # Concatenate all audio segments and save to a temporary WAV file
-            full_audio = np.concatenate(audios)
-            with NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav_file:
-                write(temp_wav_file.name, 24000, full_audio)
-                temp_wav_path = temp_wav_file.name
+            # Convert each segment to 16-bit PCM straight into one buffer,
+            # instead of concatenating float copies first
+            audio_np_int16 = np.empty(sum(len(a) for a in audios), dtype="<i2")
+            cursor = 0
+            for segment in audios:
+                end = cursor + len(segment)
+                np.multiply(segment, 32767, out=segment)
+                np.clip(segment, -32768, 32767, out=segment)
+                audio_np_int16[cursor:end] = segment
+                cursor = end
 
-            # Load the temporary WAV file as an AudioSegment
-            audio = AudioSegment.from_file(temp_wav_path, format="wav")
+            # Create AudioSegment directly from bytes
+            audio = AudioSegment(
+                data=audio_np_int16.tobytes(),
+                sample_width=2,  # 16-bit
+                frame_rate=24000,
+                channels=1,  # mono
+            )
             return audio, None
         except Exception as e:
             self.logger.error(f"Error generating audio with StyleTTS2: {e}")
@@ -8,6 +8,14 @@ from pydub import AudioSegment
 from database.crud import PodcastData, update_podcast
 from .tts_engines import TTSEngine
 
+# More flexible speaker tag pattern that handles variations
+SPEAKER_TAG_REGEX = re.compile(
+    r"\s*(?:speaker\s*[12]|SPEAKER\s*[12]|Speaker\s*[12]):\s*", flags=re.IGNORECASE
+)
+# Parenthetical notes (with the whitespace around them) or any other whitespace
+# run; both collapse to one space, so a single pass does the whole cleanup
+NOTE_OR_WHITESPACE_REGEX = re.compile(r"(?:\s*\([^)]+\))+\s*|\s+")
+
 
 @dataclass
 class SpeakerTiming:
@@ -51,29 +59,23 @@ class PodcastGenerator:
         # Clean and normalize the transcript
         transcript = transcript.strip()
 
-        # More flexible regex pattern that handles variations
-        pattern = r"\s*(?:speaker\s*[12]|SPEAKER\s*[12]|Speaker\s*[12]):\s*"
-
         # Split the transcript by speaker tags
-        speaker_blocks = re.split(pattern, transcript, flags=re.IGNORECASE)
+        speaker_blocks = SPEAKER_TAG_REGEX.split(transcript)
 
         # Remove any empty strings and strip whitespace
         speaker_blocks = [block.strip() for block in speaker_blocks if block.strip()]
 
         # Function to clean text blocks
         def clean_text(text: str) -> str:
-            # Remove parenthetical notes
-            text = re.sub(r"\s*\([^)]+\)\s*", " ", text)
-            # Clean up any resulting double spaces
-            text = re.sub(r"\s+", " ", text)
-            return text.strip()
+            # Remove parenthetical notes and clean up any double spaces
+            return NOTE_OR_WHITESPACE_REGEX.sub(" ", text).strip()
 
         # Group the blocks into (speaker, text) pairs
         speaker_turns = []
         speaker_number = 1  # Keep track of alternating speakers
 
         # Handle the case where the first block might be speaker text without a speaker label
-        if speaker_blocks and not re.match(pattern, transcript, flags=re.IGNORECASE):
+        if speaker_blocks and not SPEAKER_TAG_REGEX.match(transcript):
             cleaned_text = clean_text(speaker_blocks[0])
             if cleaned_text:  # Only add if there's text after cleaning
                 speaker_turns.append((f"speaker{speaker_number}", cleaned_text))
@@ -173,15 +175,8 @@ class PodcastGenerator:
             ):
                 raise ValueError("No audio segments were successfully generated")
 
-            # Mix audio tracks
-            total_duration = max(
-                (timing.start_time + len(timing.audio))
-                for timings in speaker_timing.values()
-                for timing in timings
-            )
-
             # Create and mix tracks
-            final_audio = self._mix_tracks(speakers, speaker_timing, total_duration)
+            final_audio = self._mix_tracks(speakers, speaker_timing)
             audio_path = await self.tts_engine.export_audio(
                 final_audio, transcript, title, podcast_id=podcast_id
             )
@@ -199,17 +194,44 @@ class PodcastGenerator:
         self,
         speakers: Dict[str, SpeakerConfig],
         speaker_timing: Dict[str, List[SpeakerTiming]],
-        total_duration: int,
     ) -> AudioSegment:
         """Mix individual speaker tracks into final audio"""
+        # Turns follow each other without overlapping, so each speaker's track
+        # is its own segments with silence wherever another speaker talks. It
+        # is built with a single join instead of overlaying every turn onto a
+        # full-length track, which copied the whole podcast once per turn
+        turns = sorted(
+            (
+                (timing.start_time, speaker, timing.audio)
+                for speaker, timings in speaker_timing.items()
+                for timing in timings
+            ),
+            key=lambda turn: turn[0],
+        )
+
+        # Bring every segment to a common format, as overlay() would have
+        frame_rate = max(audio.frame_rate for _, _, audio in turns)
+        channels = max(audio.channels for _, _, audio in turns)
+        sample_width = max(audio.sample_width for _, _, audio in turns)
+        turns = [
+            (
+                speaker,
+                audio.set_frame_rate(frame_rate)
+                .set_channels(channels)
+                .set_sample_width(sample_width),
+            )
+            for _, speaker, audio in turns
+        ]
+
         speaker_tracks = {}
 
         for speaker in speakers:
-            track = AudioSegment.silent(duration=total_duration)
-
-            # Add all segments for this speaker
-            for timing in speaker_timing[speaker]:
-                track = track.overlay(timing.audio, position=timing.start_time)
+            track = turns[0][1]._spawn(
+                b"".join(
+                    audio.raw_data if owner == speaker else bytes(len(audio.raw_data))
+                    for owner, audio in turns
+                )
+            )
 
             # Apply panning
             track = track.pan(speakers[speaker].pan)
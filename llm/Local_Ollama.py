@@ -6,8 +6,10 @@ load_dotenv()
 ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 model_name = os.getenv("MODEL_NAME")
 
+# Shared so every call reuses the same pooled HTTP connection to the server
+client = Client(host=ollama_base_url)
+
 def ask_Ollama(user_message, system_message="You are a helpful assistant"):
-    client = Client(host=ollama_base_url)
     stream = client.chat(
         model=model_name,
         messages=[{'role': 'user', 'content': user_message}],
@@ -154,6 +154,14 @@ class RemoveAudioRequest(BaseModel):
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if os.getenv("F5_WARMUP", "False").lower() == "true":
+        from TTS.F5_TTS.F5 import warmup
+
+        await asyncio.to_thread(warmup)  # Load F5-TTS before the first task
+    if os.getenv("STYLETTS2_WARMUP", "False").lower() == "true":
+        from TTS.styletts2.ljspeechimportable import warmup as styletts2_warmup
+
+        await asyncio.to_thread(styletts2_warmup)
     stop_event.clear()  # Ensure the event is clear before starting the thread
     thread = start_task_processor(stop_event)
     scheduler_task = asyncio.create_task(schedule_fetch_articles())
@@ -0,0 +1,32 @@
+from utils.common_utils import split_text
+
+
+def _paragraph(words: int) -> str:
+    # A sentence boundary every 13 words so long paragraphs can be split
+    return " ".join(
+        f"word{i}." if i % 13 == 12 else f"word{i}" for i in range(words)
+    )
+
+
+def test_split_text_keeps_every_paragraph():
+    text = "\n\n".join(_paragraph(100) for _ in range(10))
+    chunks = split_text(text, max_words=300)
+    assert len(chunks) > 1
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_split_text_keeps_every_sentence_of_a_long_paragraph():
+    text = _paragraph(800)
+    chunks = split_text(text, max_words=300)
+    assert len(chunks) > 1
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_split_text_mixed_paragraph_lengths():
+    text = "\n\n".join(_paragraph(n) for n in (50, 700, 20, 290, 310, 5))
+    chunks = split_text(text, max_words=300)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_split_text_short_text_is_one_chunk():
+    assert split_text("Just a few words.", max_words=300) == ["Just a few words."]
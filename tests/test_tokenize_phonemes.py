@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("phonemizer")
+
+from TTS.styletts2.text_utils import tokenize_phonemes
+
+
+@pytest.mark.parametrize(
+    "phonemes, expected",
+    [
+        # Stress and length marks stay attached to their word
+        ("həlˈoʊ wˈɜːld.", "həlˈoʊ wˈɜːld ."),
+        ("ˌʌndɚstˈænd, jˈɛs!", "ˌʌndɚstˈænd , jˈɛs !"),
+        # Three dots form one token, a fourth is a separate full stop
+        ("wˈeɪt... ðˈɛn", "wˈeɪt ... ðˈɛn"),
+        ("wˈeɪt....", "wˈeɪt ... ."),
+        ("wˈeɪt… ðˈɛn", "wˈeɪt … ðˈɛn"),
+        # Brackets and quotes are split off both sides
+        ("ðə (bˈɪɡ) dˈɔːɡ", "ðə ( bˈɪɡ ) dˈɔːɡ"),
+        ("[nˈoʊt] {ˈʌðɚ}", "[ nˈoʊt ] { ˈʌðɚ }"),
+        ('hiː sˈɛd "hˈaɪ"', 'hiː sˈɛd " hˈaɪ "'),
+        ("“kwˈoʊt”; «ɛnd»", "“ kwˈoʊt ” ; « ɛnd »"),
+        ("  ", ""),
+    ],
+)
+def test_tokenize_phonemes(phonemes, expected):
+    assert tokenize_phonemes(phonemes) == expected
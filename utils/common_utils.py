@@ -9,6 +9,9 @@ import logging
 from num2words import num2words
 from typing import Optional
 
+WORD_REGEX = re.compile(r"\w+")
+SENTENCE_BOUNDARY_REGEX = re.compile(r"(?<=[.!?]) +")
+
 def sanitize_filename(filename):
     """
     Remove or replace invalid characters in filenames.
@@ -51,13 +54,13 @@ def shorten_text(text):
 
 def split_text(text, max_words=1500):
     def count_words(text):
-        return len(re.findall(r"\w+", text))
+        return len(WORD_REGEX.findall(text))
 
     def split_into_paragraphs(text):
         return text.split("\n\n")
 
     def split_into_sentences(text):
-        return re.split(r"(?<=[.!?]) +", text)
+        return SENTENCE_BOUNDARY_REGEX.split(text)
 
     words = count_words(text)
     logging.debug(f"Total number of words in text: {words}")
@@ -80,6 +83,8 @@ def split_text(text, max_words=1500):
         else:
             if current_chunk:
                 chunks.append(current_chunk.strip())
+            current_chunk = ""
+            current_word_count = 0
             if paragraph_word_count > max_words:
                 sentences = split_into_sentences(paragraph)
                 for sentence in sentences:
@@ -94,11 +99,11 @@ def split_text(text, max_words=1500):
                             chunks.append(current_chunk.strip())
                         current_chunk = sentence + " "
                         current_word_count = sentence_word_count
+                # The last sentences stay in current_chunk and are flushed
+                # with the following paragraphs or at the end
             else:
                 current_chunk = paragraph + "\n\n"
                 current_word_count = paragraph_word_count
-            current_chunk = ""
-            current_word_count = 0
 
     if current_chunk:
         chunks.append(current_chunk.strip())
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import os
 import re
 import tempfile
 from datetime import datetime
@@ -20,6 +21,34 @@ from readabilipy import simple_json_from_html_string
 from database.crud import ArticleData, update_article
 from llm.LLM_calls import tldr
 
+# Patterns used by the cleaning helpers, compiled once at import
+WORD_REGEX = re.compile(r"\b\w+\b")
+INLINE_WHITESPACE_REGEX = re.compile(r"[ \t]+")
+PARAGRAPH_BREAK_REGEX = re.compile(r"\n\s*\n")
+SENTENCE_END_NEWLINE_REGEX = re.compile(
+    r"(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|!|\n)\n"
+)
+SEPARATOR_LINE_REGEX = re.compile(r"\n[\-_]\n")
+SEPARATOR_RUN_REGEX = re.compile(r"[\-_]{3,}")
+WIKI_HEADLINE_REGEX = re.compile(r"(={2,})\s*(.*?)\s*\1")
+WIKI_LEADING_EQUALS_REGEX = re.compile(r"^\s*=\s*", flags=re.MULTILINE)
+PDF_HEADER_FOOTER_REGEX = re.compile(r"^.*?-{3,}|-{3,}.*?$", flags=re.MULTILINE)
+PDF_PARAGRAPH_BREAK_REGEX = re.compile(r"\n\s*\n+")
+PDF_REFERENCES_REGEX = re.compile(r"References\s*\n(.*\n)*", flags=re.IGNORECASE)
+PDF_CITATION_REGEX = re.compile(r"\[\d+(?:,\s*\d+)*\]")
+PDF_URL_REGEX = re.compile(r"http[s]?://\S+")
+PDF_PUBLICATION_DATE_REGEX = re.compile(
+    r", Vol\. \d+, No\. \d+, Article \d+\. Publication date: [A-Za-z]+ \d{4}\.?"
+)
+PDF_PAGE_HEADER_REGEX = re.compile(r"^\d+(\s*[A-Za-z\s,]+)*$", flags=re.MULTILINE)
+PDF_HYPHENATED_REGEX = re.compile(r"(\w+)-\n(\w+)")
+PDF_PUNCTUATION_SPACING_REGEX = re.compile(r"([.!?])(\w)")
+PDF_EM_DASH_REGEX = re.compile(r"\s*—\s*")
+WHITESPACE_REGEX = re.compile(r"\s+")
+PDF_ELLIPSIS_REGEX = re.compile(r"\.{3,}")
+PDF_TRAILING_HYPHEN_REGEX = re.compile(r"(\w+)-\n")
+PDF_NUMBER_LINE_REGEX = re.compile(r"^\d+\s*$", flags=re.MULTILINE)
+
 
 # Format in this format: January 1st 2024
 def get_formatted_date():
@@ -35,7 +64,7 @@ def get_formatted_date():
 
 # Function to check if word count is less than 200
 def check_word_count(text):
-    words = re.findall(r"\b\w+\b", text)
+    words = WORD_REGEX.findall(text)
     return len(words) < 200
 
 
@@ -104,13 +133,15 @@ def extract_with_jina(url):
 
 def clean_text(text):
     # Remove extraneous whitespace within paragraphs
-    text = re.sub(r"[ \t]+", " ", text)
+    text = INLINE_WHITESPACE_REGEX.sub(" ", text)
 
     # Ensure that there are two newlines between paragraphs
-    text = re.sub(r"\n\s*\n", "\n\n", text)  # Ensure two newlines between paragraphs
-    text = re.sub(r"(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|!|\n)\n", "\n\n", text)
-    text = re.sub(r"\n[\-_]\n", "", text)  # Remove 3 or more consecutive dashes
-    text = re.sub(r"[\-_]{3,}", "", text)  # Remove 3 or more consecutive underscores
+    text = PARAGRAPH_BREAK_REGEX.sub("\n\n", text)  # Ensure two newlines between paragraphs
+    text = SENTENCE_END_NEWLINE_REGEX.sub("\n\n", text)
+    # Lone separator lines are rare; a substring check is cheaper than the scan
+    if "\n-\n" in text or "\n_\n" in text:
+        text = SEPARATOR_LINE_REGEX.sub("", text)  # Remove 3 or more consecutive dashes
+    text = SEPARATOR_RUN_REGEX.sub("", text)  # Remove 3 or more consecutive underscores
 
     # Convert HTML entities to plain text
     text = BeautifulSoup(text, "html.parser").text
@@ -133,73 +164,76 @@ def clean_wikipedia_content(content):
             return f"{text.upper()}\n"
 
     # Replace all levels of headlines
-    cleaned_content = re.sub(r"(={2,})\s*(.*?)\s*\1", replace_headline, content)
+    cleaned_content = WIKI_HEADLINE_REGEX.sub(replace_headline, content)
 
     # Remove any remaining single '=' characters at the start of lines
-    cleaned_content = re.sub(r"^\s*=\s*", "", cleaned_content, flags=re.MULTILINE)
+    cleaned_content = WIKI_LEADING_EQUALS_REGEX.sub("", cleaned_content)
 
     return cleaned_content
 
 
 def clean_pdf_text(text):
-    # Import the re module
-    import re
-
+    # Rarely matching patterns are only run when the literal substring they
+    # need is present, which is a much cheaper scan than the regex itself
     # Remove headers and footers (assuming they're separated by multiple dashes)
-    text = re.sub(r"^.*?-{3,}|-{3,}.*?$", "", text, flags=re.MULTILINE)
+    if "---" in text:
+        text = PDF_HEADER_FOOTER_REGEX.sub("", text)
 
     # Remove extraneous whitespace within paragraphs
-    text = re.sub(r"[ \t]+", " ", text)
+    text = INLINE_WHITESPACE_REGEX.sub(" ", text)
 
     # Ensure that there are two newlines between paragraphs
-    text = re.sub(r"\n\s*\n+", "\n\n", text)
+    text = PDF_PARAGRAPH_BREAK_REGEX.sub("\n\n", text)
 
     # Remove the references section
-    text = re.sub(r"References\s*\n(.*\n)*", "", text, flags=re.IGNORECASE)
+    text = PDF_REFERENCES_REGEX.sub("", text)
 
     # Remove any remaining citation numbers in square brackets
-    text = re.sub(r"\[\d+(?:,\s*\d+)*\]", "", text)
+    if "[" in text:
+        text = PDF_CITATION_REGEX.sub("", text)
 
     # Remove any remaining URLs
-    text = re.sub(r"http[s]?://\S+", "", text)
+    if "http" in text:
+        text = PDF_URL_REGEX.sub("", text)
 
     # Remove any remaining publication date lines
-    text = re.sub(
-        r", Vol\. \d+, No\. \d+, Article \d+\. Publication date: [A-Za-z]+ \d{4}\.?",
-        "",
-        text,
-    )
+    if "Publication date" in text:
+        text = PDF_PUBLICATION_DATE_REGEX.sub("", text)
 
     # Remove any remaining page numbers and headers/footers
-    text = re.sub(r"^\d+(\s*[A-Za-z\s,]+)*$", "", text, flags=re.MULTILINE)
+    text = PDF_PAGE_HEADER_REGEX.sub("", text)
 
     # Remove empty lines at the beginning and end of the text
     text = text.strip()
 
     # Merge hyphenated words split across lines
-    text = re.sub(r"(\w+)-\n(\w+)", r"\1\2", text)
+    if "-\n" in text:
+        text = PDF_HYPHENATED_REGEX.sub(r"\1\2", text)
 
     # Ensure proper spacing after punctuation
-    text = re.sub(r"([.!?])(\w)", r"\1 \2", text)
+    text = PDF_PUNCTUATION_SPACING_REGEX.sub(r"\1 \2", text)
 
     # Normalize spaces around em dashes
-    text = re.sub(r"\s*—\s*", " — ", text)
+    if "—" in text:
+        text = PDF_EM_DASH_REGEX.sub(" — ", text)
 
     # Format paragraphs: remove single newlines within paragraphs, ensure double newlines between paragraphs
     paragraphs = text.split("\n\n")
     formatted_paragraphs = [
-        re.sub(r"\s+", " ", p.strip()) for p in paragraphs if p.strip()
+        WHITESPACE_REGEX.sub(" ", p.strip()) for p in paragraphs if p.strip()
     ]
     text = "\n\n".join(formatted_paragraphs)
 
     # Remove occurrences with more than three dots
-    text = re.sub(r"\.{3,}", "", text)
+    if "..." in text:
+        text = PDF_ELLIPSIS_REGEX.sub("", text)
 
     # Remove words ending with a hyphen directly before a newline
-    text = re.sub(r"(\w+)-\n", r"\1", text)
+    if "-\n" in text:
+        text = PDF_TRAILING_HYPHEN_REGEX.sub(r"\1", text)
 
     # Remove lines that contain numbers only
-    text = re.sub(r"^\d+\s*$", "", text, flags=re.MULTILINE)
+    text = PDF_NUMBER_LINE_REGEX.sub("", text)
 
     return text
 
@@ -266,12 +300,20 @@ def extract_from_wikipedia(
 
 def download_pdf_file(url, timeout=30):
     try:
-        response = requests.get(url, timeout=timeout)
-        response.raise_for_status()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            temp_file.write(response.content)
-            logging.info(f"PDF file downloaded to {temp_file.name}")
-            return temp_file.name
+        # Stream the body to disk as it arrives instead of buffering the whole PDF
+        with requests.get(url, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+                try:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        temp_file.write(chunk)
+                except BaseException:
+                    # Don't leave a truncated PDF behind when the body fails mid-stream
+                    temp_file.close()
+                    os.unlink(temp_file.name)
+                    raise
+                logging.info(f"PDF file downloaded to {temp_file.name}")
+                return temp_file.name
     except requests.RequestException as e:
         logging.error(f"Error downloading PDF: {e}")
         return None